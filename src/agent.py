@@ -1,7 +1,10 @@
 from __future__ import annotations
-from typing import Any, Literal, TYPE_CHECKING
+from typing import Any, Callable, Literal, TYPE_CHECKING
 import random
 
+import numpy as np
+
+from src.kernels import default_utility_scan
 from src.types import (
 	Position,
 	NodeID,
@@ -43,8 +46,19 @@ class Agent:
 		self.happiness  : float            = happiness if happiness is not None else DEFAULT_HAPPINESS
 
 	def get_utility_at_node(self, node: NodeID, model : SchellingModel, context : Any) -> float:
-		rev_assignment        = {v: k for k, v in model.history[-1].items()}
-		neighborhood          = model.topology.graph.neighbors(node)
+		if model.utility_ids is not None:
+			# fixed-width row gather + mask instead of a per-neighbor dict
+			# walk; padded slots resolve to -1 through the sentinel and are
+			# dropped with the free nodes
+			if model.topology.neighbor_matrix is not None:
+				occupants = model.node_to_agent[model.topology.neighbor_matrix[node]]
+			else:
+				occupants = model.node_to_agent[model.topology.neighbors_of(node)]
+			neighbor_ids = occupants[occupants >= 0]
+			result       = model.utility_ids(self.id, neighbor_ids, context)
+			return result
+		neighborhood          = model.topology.neighbors_of(node)
+		rev_assignment        = model.rev_assignment
 		neighbor_agent_ids    = [rev_assignment[node_id] for node_id in neighborhood if node_id in rev_assignment]
 		neighbor_agents       = [model.agents[agent_id] for agent_id in neighbor_agent_ids]
 		neighbor_agent_values = [agent.value for agent in neighbor_agents]
@@ -62,20 +76,63 @@ class Agent:
 		context    : Any,
 	) -> NodeID:
 		# this function assumes that the utility value is up-to-date
-		best_utility      = self.v_utility
-		best_node         = self.graph_pos
-		scrambled_indices = list(range(len(free_nodes)))
-		while len(scrambled_indices) > 0:
-			i           = random.choice(scrambled_indices)
+		if (
+			len(free_nodes) > 0
+			and model.utility_ids is not None
+			and model.topology.csr_indptr is not None
+		):
+			# default utility + CSR topology: score every candidate in one
+			# parallel kernel pass instead of one Python call per candidate
+			# (max-mode ties break by candidate order here, where the scalar
+			# loop breaks them by random scan order)
+			candidates = np.asarray(free_nodes, dtype = np.int32)
+			values, discrete_flags, range_dists = model.store.as_matrix()
+			utilities  = default_utility_scan(
+				candidates,
+				model.topology.csr_indptr,
+				model.topology.csr_indices,
+				model.node_to_agent,
+				values,
+				discrete_flags,
+				range_dists,
+				values[:, self.id].copy(),
+			)
+			if mode == "any":
+				# same first-improvement-in-random-order semantics as the
+				# scalar loop, just over precomputed scores
+				order = list(range(len(free_nodes)))
+				random.shuffle(order)
+				for i in order:
+					if utilities[i] > self.v_utility:
+						self.v_utility = float(utilities[i])
+						return int(candidates[i])
+				return self.graph_pos
+			best = int(np.argmax(utilities))
+			if utilities[best] > self.v_utility:
+				self.v_utility = float(utilities[best])
+				return int(candidates[best])
+			return self.graph_pos
+		best_utility = self.v_utility
+		best_node    = self.graph_pos
+		# one upfront Fisher-Yates shuffle: O(k) total, where the former
+		# choice-then-remove loop paid an O(k) list scan per pick
+		order = list(range(len(free_nodes)))
+		random.shuffle(order)
+		for i in order:
 			node        = free_nodes[i]
 			new_utility = self.get_utility_at_node(node, model, context)
 			if new_utility > best_utility:
 				if mode == "any":
+					self.v_utility = new_utility
 					return node
 				else:
 					best_utility = new_utility
 					best_node    = node
-			scrambled_indices.remove(i)
+					# saturating max: the agent is happy enough here, no
+					# point scoring the remaining candidates
+					if best_utility >= self.happiness:
+						break
+		self.v_utility = best_utility
 		return best_node
 
 	def get_move_swap(
@@ -86,27 +143,71 @@ class Agent:
 		context        : Any,
 	) -> NodeID:
 		# this function assumes that the utility value is up-to-date
-		best_utility      = self.v_utility
-		best_node         = self.graph_pos
-		scrambled_indices = list(range(len(occupied_nodes)))
-		scrambled_indices.remove(self.graph_pos)
-		while len(scrambled_indices) > 0:
-			i = random.choice(scrambled_indices)
-			scrambled_indices.remove(i)
-			node = occupied_nodes[i]
-			swap_partner = model.agents[model.history[-1][node]]
-			if self.value == swap_partner.value:
-				continue
-			new_utility = self.get_utility_at_node(node, model, context)
+		# candidates come pre-grouped by resident value: only nodes whose
+		# occupant differs from self, so the old per-candidate partner lookup
+		# and equality skip (and the self-position check) leave the loop
+		self_key   = model.store.value_key(self.id)
+		candidates = [
+			node
+			for key, nodes in model.occupied_by_value.items()
+			if key != self_key
+			for node in nodes
+		]
+		utilities : np.ndarray | None = None
+		if (
+			len(candidates) > 0
+			and model.utility_ids is not None
+			and model.topology.csr_indptr is not None
+		):
+			# same batch kernel as the jump scan: score every candidate in one
+			# parallel pass before the shuffled selection walk
+			values, discrete_flags, range_dists = model.store.as_matrix()
+			utilities  = default_utility_scan(
+				np.asarray(candidates, dtype = np.int32),
+				model.topology.csr_indptr,
+				model.topology.csr_indices,
+				model.node_to_agent,
+				values,
+				discrete_flags,
+				range_dists,
+				values[:, self.id].copy(),
+			)
+		best_utility = self.v_utility
+		best_node    = self.graph_pos
+		# shuffled index walk, same as get_move_jump; this also fixes the old
+		# loop removing the same index twice (which blew up in "max" mode) and
+		# its skipping of self by treating graph_pos as a list index
+		order = list(range(len(candidates)))
+		random.shuffle(order)
+		for i in order:
+			node        = candidates[i]
+			new_utility = float(utilities[i]) if utilities is not None else self.get_utility_at_node(node, model, context)
 			if new_utility > best_utility:
 				if mode == "any":
+					self.v_utility = new_utility
 					return node
 				else:
 					best_utility = new_utility
 					best_node    = node
-			scrambled_indices.remove(i)
+					if best_utility >= self.happiness:
+						break
+		self.v_utility = best_utility
 		return best_node
 
+	def get_move_random_swap(self, model: SchellingModel) -> NodeID:
+		# the pool is maintained per step on the model; this agent is in it
+		# (it would have early-returned in get_move otherwise)
+		unhappy_agents = model.unhappy_ids
+		if len(unhappy_agents) <= 1:
+			return self.graph_pos
+		swap_partner = random.choice(unhappy_agents)
+		while swap_partner == self.id:
+			swap_partner = random.choice(unhappy_agents)
+		# proposals are node targets across every move mode: hand back the
+		# partner's node and let the commit phase resolve the occupant under
+		# the frozen assignment
+		return model.agents[swap_partner].graph_pos
+
 	def get_move(
 		self,
 		model          : SchellingModel,
@@ -119,22 +220,22 @@ class Agent:
 		# basis and avoid conflicts
 		if self.nature == "stubborn" or self.v_utility >= self.happiness:
 			return self.graph_pos
-		elif self.nature == "random":
-			if   "jump" in self.move_mode:
-				return random.choice(free_nodes)
-			elif "swap" in self.move_mode:
-				unhappy_agents = [agent.id for agent in model.agents if agent.v_utility < agent.happiness]
-				unhappy_agents.remove(self.id)
-				swap_partner = random.choice(unhappy_agents)
-				return swap_partner
-			else:
-				raise ValueError(f"Unknown move mode '{self.move_mode}'")
-		elif self.nature == "strategic":
-			if   self.move_mode == "jump"     :  return self.get_move_jump(model, free_nodes,     "any", context)
-			elif self.move_mode == "swap"     :  return self.get_move_swap(model, occupied_nodes, "any", context)
-			elif self.move_mode == "max_jump" :  return self.get_move_jump(model, free_nodes,     "max", context)
-			elif self.move_mode == "max_swap" :  return self.get_move_swap(model, occupied_nodes, "max", context)
-			else:
-				raise ValueError(f"Unknown move mode '{self.move_mode}'")
-		else:
-			raise ValueError(f"Unknown agent nature '{self.nature}'")
+		move = MOVE_DISPATCH.get((self.nature, self.move_mode))
+		if move is None:
+			raise ValueError(f"Unknown nature/move mode '{self.nature}'/'{self.move_mode}'")
+		return move(self, model, free_nodes, occupied_nodes, context)
+
+
+# O(1) dispatch over the (nature, move_mode) pair for the per-agent hot path,
+# replacing the per-call cascade of string comparisons ("stubborn" never
+# reaches the table: it early-returns in get_move along with happy agents)
+MOVE_DISPATCH : dict[tuple[AgentType_Nature, MovementMode], Callable[..., NodeID]] = {
+	("random",    "jump")     : lambda agent, model, free, occupied, context : random.choice(free),
+	("random",    "max_jump") : lambda agent, model, free, occupied, context : random.choice(free),
+	("random",    "swap")     : lambda agent, model, free, occupied, context : agent.get_move_random_swap(model),
+	("random",    "max_swap") : lambda agent, model, free, occupied, context : agent.get_move_random_swap(model),
+	("strategic", "jump")     : lambda agent, model, free, occupied, context : agent.get_move_jump(model, free,     "any", context),
+	("strategic", "swap")     : lambda agent, model, free, occupied, context : agent.get_move_swap(model, occupied, "any", context),
+	("strategic", "max_jump") : lambda agent, model, free, occupied, context : agent.get_move_jump(model, free,     "max", context),
+	("strategic", "max_swap") : lambda agent, model, free, occupied, context : agent.get_move_swap(model, occupied, "max", context),
+}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from typing import Callable, Iterable, Literal
+from concurrent.futures import ThreadPoolExecutor
 from os.path import sep
 
 from matplotlib.pyplot      import Figure
@@ -14,7 +15,7 @@ from kivy_garden.matplotlib import FigureCanvasKivyAgg
 
 from src.types           import AgentType_Name
 from src.model           import SchellingModel
-from src.utils           import combine_img_plots, export_gif_from_pngs
+from src.utils           import combine_img_plots, export_gif_from_pngs, renice
 from src.config_defaults import (
 	TMP_IMG_DIR,
 	OUT_IMG_DIR,
@@ -31,6 +32,10 @@ class MainWindow(BoxLayout):
 		self.graph_layout = None
 		self.with_labels  = False
 		self.with_edges   = False
+		# mirrors of the widget states, kept current by the bound callbacks so
+		# renders and exports read an attribute instead of scanning widgets
+		self.iter_value    = 0
+		self.selected_type = next(iter(model.domain.keys()))
 		# TODO show color legend
 		self.build_controls()
 		self.render()
@@ -64,7 +69,10 @@ class MainWindow(BoxLayout):
 		fig.set_size_inches(DEFAULT_FIGSIZE, forward = True)  #type:ignore
 		fig.tight_layout()
 		filepath = MainWindow.get_export_path("png", iter_step, type_name, dir_path)
-		fig.savefig(f"{filepath}", bbox_inches='tight', pad_inches = DEFAULT_PADDING)
+		# tight_layout above already fits the axes to the canvas; asking savefig
+		# for bbox_inches='tight' on top would re-render the whole figure a
+		# second time just to measure the bounding box it then crops to
+		fig.savefig(f"{filepath}", pad_inches = DEFAULT_PADDING)
 		return filepath
 
 	def export_png_plot_at_iter(
@@ -95,27 +103,35 @@ class MainWindow(BoxLayout):
 		dir_path = TMP_IMG_DIR if is_tmp else OUT_IMG_DIR
 		filepath = MainWindow.get_export_path("png", iter_step, None, dir_path)
 		result_fig = combine_img_plots(fig_paths)
-		result_fig.savefig(filepath, bbox_inches='tight', pad_inches = DEFAULT_PADDING)
+		result_fig.savefig(filepath, pad_inches = DEFAULT_PADDING)
 		return filepath
 
 	def export_gif_plot(self, type_name: AgentType_Name) -> str:
-		fig_paths = []
-		for iter_step in range(self.model.max_iter + 1):
-			print(f"Building image {iter_step} out of {self.model.max_iter} for gif...")
-			fig_path = self.export_png_plot_at_iter(iter_step, type_name)
-			fig_paths.append(fig_path)
-		gif_path = MainWindow.get_export_path("gif", None, type_name, OUT_IMG_DIR)
-		export_gif_from_pngs(fig_paths, gif_path)
+		# frames are independent (one cached figure each): encode them on a
+		# thread pool, with map keeping fig_paths in iteration order for the gif
+		print(f"Building {self.model.max_iter + 1} images for gif...")
+		# deprioritize only this batch phase, so the interactive UI process is
+		# not left niced down after the export finishes
+		with renice(19):
+			with ThreadPoolExecutor() as executor:
+				fig_paths = list(executor.map(
+					lambda iter_step: self.export_png_plot_at_iter(iter_step, type_name),
+					range(self.model.max_iter + 1),
+				))
+			gif_path = MainWindow.get_export_path("gif", None, type_name, OUT_IMG_DIR)
+			export_gif_from_pngs(fig_paths, gif_path)
 		return gif_path
 
 	def export_gif_all_plots(self) -> str:
-		fig_paths = []
-		for iter_step in range(self.model.max_iter + 1):
-			print(f"Building image {iter_step} out of {self.model.max_iter} for gif...")
-			fig_path = self.export_png_all_plots_at_iter(iter_step, True)
-			fig_paths.append(fig_path)
-		gif_path = MainWindow.get_export_path("gif", None, None, OUT_IMG_DIR)
-		export_gif_from_pngs(fig_paths, gif_path)
+		print(f"Building {self.model.max_iter + 1} images for gif...")
+		with renice(19):
+			with ThreadPoolExecutor() as executor:
+				fig_paths = list(executor.map(
+					lambda iter_step: self.export_png_all_plots_at_iter(iter_step, True),
+					range(self.model.max_iter + 1),
+				))
+			gif_path = MainWindow.get_export_path("gif", None, None, OUT_IMG_DIR)
+			export_gif_from_pngs(fig_paths, gif_path)
 		return gif_path
 
 	def run_build_all_graphs_from_config(
@@ -164,7 +180,8 @@ class MainWindow(BoxLayout):
 		self.render()
 
 	def on_type_radio_selected(self, instance):
-		instance.state = "down"
+		instance.state      = "down"
+		self.selected_type  = instance.text
 		self.render()
 
 
@@ -248,12 +265,10 @@ class MainWindow(BoxLayout):
 		return result
 
 	def get_iter_step(self) -> int:
-		result = int(self.slider_iters.value)
-		return result
+		return self.iter_value
 
 	def get_selected_type(self) -> AgentType_Name:
-		result = [button.text for button in self.type_radio.children if button.state == "down"][0]
-		return result
+		return self.selected_type
 
 
 
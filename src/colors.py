@@ -1,6 +1,7 @@
 from typing import Literal, get_args
 
 from matplotlib.pyplot import get_cmap   #type:ignore
+from matplotlib.colors import to_rgba, CSS4_COLORS
 
 from src.types import AgentType_Domain, AgentType_ColorMap
 
@@ -31,6 +32,14 @@ DEFAULT_COLORS_LIST = [
 	"black",
 ]
 
+# the names above resolved to RGBA once at import, so matplotlib does not
+# re-parse the strings on every draw (gif exports redraw hundreds of times);
+# "mint" and "apricot" only exist in the xkcd survey set, hence the fallback
+DEFAULT_COLORS_RGBA : list[tuple[float, float, float, float]] = [
+	to_rgba(name) if name in CSS4_COLORS else to_rgba(f"xkcd:{name}")
+	for name in DEFAULT_COLORS_LIST
+]
+
 DefaultColormapLiterals = Literal[
 	"magma",
 	"magma_r",
@@ -58,6 +67,8 @@ DefaultColormapLiterals = Literal[
 DEFAULT_COLORMAPS : tuple[DefaultColormapLiterals, ...] = get_args(DefaultColormapLiterals)
 # usage: plt.get_cmap("magma")  #type:ignore
 
+DEFAULT_CONTINUOUS_CMAP = get_cmap("plasma")  # looked up once, not per continuous type  #type:ignore
+
 
 
 def get_default_colormap(
@@ -70,11 +81,11 @@ def get_default_colormap(
 			result[name] = colormap[name]
 		elif isinstance(values, list):
 			result[name] = {
-				value: DEFAULT_COLORS_LIST[i]
+				value: DEFAULT_COLORS_RGBA[i]
 				for i, value in enumerate(values)
 			}
 		else:
-			result[name] = get_cmap("plasma")
+			result[name] = DEFAULT_CONTINUOUS_CMAP
 	return result
 
 
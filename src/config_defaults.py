@@ -18,6 +18,4 @@ DEFAULT_AGENT_NATURES : AgentType_NatureProportions = {  # distribution of agent
 OUT_IMG_DIR = f"out_images" # default output directory for images
 TMP_IMG_DIR = f"out_images{sep}tmp_images" # default temporary output directory for images used to compose gifs
 
-DEFAULT_ANTILAG_SLEEP = 0.01 # default sleep time for the attempt at not computing too intensely
-
 SEED = 0
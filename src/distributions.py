@@ -1,8 +1,12 @@
 from __future__ import annotations
 from typing import Union, Callable
 from dataclasses import dataclass
+from itertools import accumulate
+from bisect import bisect
 import random
 
+import numpy as np
+
 from src.types import (
 	AgentType_Name,
 	AgentType_Value_Discrete,
@@ -87,11 +91,78 @@ DistributionGenerator = Union[
 	Callable[[], AgentType_Value_Continuous],
 ]
 DomainDistributions = dict[AgentType_Name, DistributionGenerator]
+BatchGenerator      = Callable[[int], np.ndarray]
+
+RNG = np.random.default_rng()
+
+def reseed_rng(seed: int | None) -> None:
+	global RNG
+	RNG = np.random.default_rng(seed)
+
+def distribution_cache_key(distribution: DistributionType) -> tuple:
+	# distribution dataclasses keep eq=True and are therefore unhashable;
+	# freeze their dict/list fields into tuples to get a usable memo key
+	frozen = tuple(
+		tuple(value.items()) if isinstance(value, dict) else
+		tuple(value)         if isinstance(value, list) else
+		value
+		for value in vars(distribution).values()
+	)
+	return (type(distribution), *frozen)
+
+# memos for the generator builders: many types often share one distribution,
+# and the returned samplers close over immutable parameters only (the batch
+# lambdas resolve RNG at call time, so reseed_rng still applies to them)
+GENERATOR_CACHE       : dict[tuple, DistributionGenerator] = {}
+BATCH_GENERATOR_CACHE : dict[tuple, BatchGenerator]        = {}
+
+def build_custom_discrete_generator(proportions: dict[str, float]) -> DistributionGenerator:
+	# precompute the key list and cumulative weights once, then sample with a
+	# bare bisect: one uniform draw and one binary search per value, without
+	# the argument validation and list building random.choices repeats per call
+	keys        = list(proportions.keys())
+	cum_weights = list(accumulate(proportions.values()))
+	total       = cum_weights[-1]
+	return lambda : keys[bisect(cum_weights, random.random() * total)]
+
+def distribution_type_to_batch_generator(distribution: DistributionType) -> BatchGenerator:
+	"""
+	Batched sibling of distribution_type_to_generator: returns a sampler that
+	draws n values in one vectorized call, for amortized population setup.
+	"""
+	cache_key = distribution_cache_key(distribution)
+	if cache_key in BATCH_GENERATOR_CACHE:
+		return BATCH_GENERATOR_CACHE[cache_key]
+	match distribution:
+		case Distribution_CustomDiscrete(proportions):
+			keys  = np.asarray(list(proportions.keys()))
+			probs = np.asarray(list(proportions.values()), dtype = np.float64)
+			probs = probs / probs.sum()
+			result = lambda n : RNG.choice(keys, size = n, p = probs)
+		case Distribution_UniformDiscrete   (min_val, max_val) :  result = lambda n : RNG.uniform(min_val, max_val, n)
+		case Distribution_UniformContinuous (min_val, max_val) :  result = lambda n : RNG.uniform(min_val, max_val, n)
+		case Distribution_Normal            (mean, stddev)     :  result = lambda n : RNG.normal(mean, stddev, n)
+		case Distribution_LogNormal         (mean, stddev)     :  result = lambda n : RNG.lognormal(mean, stddev, n)
+		case Distribution_Exponential       (lambda_)          :  result = lambda n : RNG.exponential(1 / lambda_, n)
+		case Distribution_Beta              (alpha, beta)      :  result = lambda n : RNG.beta(alpha, beta, n)
+		case Distribution_Gamma             (alpha, beta)      :  result = lambda n : RNG.gamma(alpha, beta, n)
+		case Distribution_Weibull           (alpha, beta)      :  result = lambda n : alpha * RNG.weibull(beta, n)
+		case Distribution_Triangular        (low, high, mode)  :  result = lambda n : RNG.triangular(low, mode, high, n)
+		case Distribution_Choice_Values     (values)           :  result = lambda n : RNG.choice(np.asarray(values), size = n)
+		case Distribution_Choice_Categories (categories)       :  result = lambda n : RNG.choice(np.asarray(categories), size = n)
+		case _:
+			scalar_generator = distribution_type_to_generator(distribution)
+			result = lambda n : np.asarray([scalar_generator() for _ in range(n)])
+	BATCH_GENERATOR_CACHE[cache_key] = result
+	return result
 
 def distribution_type_to_generator(distribution: DistributionType) -> DistributionGenerator:
+	cache_key = distribution_cache_key(distribution)
+	if cache_key in GENERATOR_CACHE:
+		return GENERATOR_CACHE[cache_key]
 	result : DistributionGenerator
 	match distribution:
-		case Distribution_CustomDiscrete    (proportions)      :  result = lambda : random.choices(list(proportions.keys()), weights=list(proportions.values()), k=1)[0]
+		case Distribution_CustomDiscrete    (proportions)      :  result = build_custom_discrete_generator(proportions)
 		case Distribution_UniformDiscrete   (min_val, max_val) :  result = lambda : random.uniform(min_val, max_val)
 		case Distribution_UniformContinuous (min_val, max_val) :  result = lambda : random.uniform(min_val, max_val)
 		case Distribution_Normal            (mean, stddev)     :  result = lambda : random.normalvariate(mean, stddev)
@@ -105,6 +176,7 @@ def distribution_type_to_generator(distribution: DistributionType) -> Distributi
 		case Distribution_Choice_Categories (categories)       :  result = lambda : random.choice(categories)
 		case _:
 			raise ValueError(f"Unknown distribution type '{distribution}'.")
+	GENERATOR_CACHE[cache_key] = result
 	return result
 
 AgentType_Distributions = dict[AgentType_Name, DistributionType]
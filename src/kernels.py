@@ -0,0 +1,159 @@
+from __future__ import annotations
+from typing import Any, Callable
+
+import numpy as np
+
+# numba is optional: when missing, the kernels below still run as plain
+# numpy-backed Python functions, just without the native-code speedup
+try:
+	from numba import njit, prange  # type:ignore
+	HAS_NUMBA = True
+except ImportError:
+	HAS_NUMBA = False
+	prange = range  # type:ignore
+	def njit(*args: Any, **kwargs: Any) -> Callable:  # type:ignore
+		if len(args) == 1 and callable(args[0]) and not kwargs:
+			return args[0]
+		def passthrough(func: Callable) -> Callable:
+			return func
+		return passthrough
+
+
+
+@njit(cache = True)
+def count_equal(
+	neighbor_codes : np.ndarray,
+	self_code      : int,
+) -> int:
+	count = 0
+	for i in range(neighbor_codes.size):
+		if neighbor_codes[i] == self_code:
+			count += 1
+	return count
+
+@njit(cache = True)
+def count_in_range_abs(
+	neighbor_vals : np.ndarray,
+	self_val      : float,
+	max_dist      : float,
+) -> int:
+	count = 0
+	for i in range(neighbor_vals.size):
+		if abs(neighbor_vals[i] - self_val) <= max_dist:
+			count += 1
+	return count
+
+@njit(cache = True)
+def count_in_range_log(
+	neighbor_vals : np.ndarray,
+	self_val      : float,
+	max_dist      : float,
+) -> int:
+	log_self = np.log(self_val)
+	count    = 0
+	for i in range(neighbor_vals.size):
+		if abs(np.log(neighbor_vals[i]) - log_self) <= max_dist:
+			count += 1
+	return count
+
+
+@njit(cache = True, fastmath = True)
+def score_same_race_religion_income(
+	self_race       : int,
+	self_religion   : int,
+	log_self_income : float,
+	races           : np.ndarray,  # int8[n_neighbors] race codes
+	religions       : np.ndarray,  # int8[n_neighbors] religion codes
+	log_incomes     : np.ndarray,  # float64[n_neighbors]
+) -> float:
+	# compiled scoring loop for the example "same race and religion above all"
+	# utility: ratio of race+religion matches (weighted 1.0 + 0.3) plus a flat
+	# bonus when any neighbor's income is within 0.2 in log-space
+	count_all = races.size
+	if count_all == 0:
+		return 0.0
+	count_both         = 0
+	has_similar_income = False
+	for i in range(count_all):
+		if races[i] == self_race and religions[i] == self_religion:
+			count_both += 1
+		if abs(log_incomes[i] - log_self_income) <= 0.2:
+			has_similar_income = True
+	result = 1.3 * count_both / count_all
+	if has_similar_income:
+		result += 0.5
+	return result
+
+
+@njit(parallel = True, cache = True)
+def default_utility_scan(
+	candidates     : np.ndarray,  # int32[n_candidates] candidate node IDs
+	csr_indptr     : np.ndarray,  # int32[n_nodes + 1]
+	csr_indices    : np.ndarray,  # int32[n_edges]
+	node_to_agent  : np.ndarray,  # int32[n_nodes], -1 when the node is free
+	values         : np.ndarray,  # float32[n_types, n_agents] agent values/codes
+	discrete_flags : np.ndarray,  # int8[n_types], 1 for discrete types
+	range_dists    : np.ndarray,  # float32[n_types] max distance per continuous type
+	self_vals      : np.ndarray,  # float32[n_types] the moving agent's values
+) -> np.ndarray:
+	"""
+	Evaluates the default scalarized utility at every candidate node in one
+	parallel pass: candidates are independent, so the scan distributes over
+	cores with each thread writing only its own utilities slot.
+	"""
+	n_candidates = candidates.size
+	n_types      = values.shape[0]
+	utilities    = np.zeros(n_candidates, dtype = np.float64)
+	for k in prange(n_candidates):
+		node  = candidates[k]
+		start = csr_indptr[node]
+		end   = csr_indptr[node + 1]
+		count_all = 0
+		for j in range(start, end):
+			if node_to_agent[csr_indices[j]] >= 0:
+				count_all += 1
+		if count_all == 0:
+			continue
+		total = 0.0
+		for t in range(n_types):
+			self_val   = self_vals[t]
+			count_same = 0
+			for j in range(start, end):
+				agent_id = node_to_agent[csr_indices[j]]
+				if agent_id < 0:
+					continue
+				if discrete_flags[t] != 0:
+					if values[t, agent_id] == self_val:
+						count_same += 1
+				elif abs(values[t, agent_id] - self_val) <= range_dists[t]:
+					count_same += 1
+			total += count_same / count_all
+		utilities[k] = total
+	return utilities
+
+
+def warmup_kernels() -> None:
+	# pay the jit-compilation cost once, up front, rather than mid-simulation
+	if not HAS_NUMBA:
+		return
+	dummy_codes = np.zeros(1, dtype = np.int32)
+	dummy_vals  = np.ones(1,  dtype = np.float32)
+	count_equal(dummy_codes, 0)
+	count_in_range_abs(dummy_vals, 1.0, 1.0)
+	count_in_range_log(dummy_vals, 1.0, 1.0)
+	score_same_race_religion_income(
+		0, 0, 0.0,
+		np.zeros(1, dtype = np.int8),
+		np.zeros(1, dtype = np.int8),
+		np.zeros(1, dtype = np.float64),
+	)
+	default_utility_scan(
+		dummy_codes,
+		np.array([0, 1], dtype = np.int32),
+		dummy_codes,
+		dummy_codes,
+		np.ones((1, 1), dtype = np.float32),
+		np.ones(1, dtype = np.int8),
+		np.ones(1, dtype = np.float32),
+		np.ones(1, dtype = np.float32),
+	)
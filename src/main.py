@@ -4,6 +4,9 @@ from os.path import exists
 import random
 from math import log
 
+import numpy as np
+
+from src.kernels import score_same_race_religion_income
 from src.types import (
 	AgentType_Domain,
 	AgentType_Vector,
@@ -22,6 +25,7 @@ from src.distributions import (
 	AgentType_Distributions,
 	Distribution_Choice_Categories,
 	Distribution_CustomDiscrete,
+	reseed_rng,
 )
 from src.config_defaults import (
 	DEFAULT_AGENT_NATURES,
@@ -101,33 +105,47 @@ def example_complex_game() -> SchellingModel:
 	}
 	constraints_race_religion_income : AgentType_Constraints | None = None
 
+	race_codes     = { value: code for code, value in enumerate(domain_race_religion_income["race"])     }
+	religion_codes = { value: code for code, value in enumerate(domain_race_religion_income["religion"]) }
+	# agent value vectors are built once at population time and never replaced,
+	# so id() is a stable key for the model's lifetime: each agent pays for its
+	# code lookups and log(income) once instead of on every utility evaluation
+	encoded_cache : dict[int, tuple[int, int, float]] = {}
+
+	def encode_race_religion_income(value: AgentType_Vector) -> tuple[int, int, float]:
+		cached = encoded_cache.get(id(value))
+		if cached is None:
+			cached = (
+				race_codes[value["race"]],
+				religion_codes[value["religion"]],
+				log(value["income"]),  #type:ignore
+			)
+			encoded_cache[id(value)] = cached
+		return cached
+
 	def same_race_and_religion_above_all(
 		self_value : AgentType_Vector,
 		neighbor_values : list[AgentType_Vector],
 		context : None,
 	) -> float:
-		neighbor_values = [v for v in neighbor_values]
+		# gather the cached encodings into small code/log arrays, then score
+		# in the compiled kernel instead of Python passes over neighbor dicts
 		count_all = len(neighbor_values)
-		count_both_same = sum(
-			1 for neighbor_value in neighbor_values
-			if neighbor_value["race"] == self_value["race"]
-			and neighbor_value["religion"] == self_value["religion"]
-		)
-		ratio_same = count_both_same / count_all if count_all != 0 else 0
-		count_similar = sum(
-			0.3 for neighbor in neighbor_values
-			if neighbor["race"] == self_value["race"]
-			and neighbor["religion"] == self_value["religion"]
+		encoded   = [encode_race_religion_income(v) for v in neighbor_values]
+		races       = np.fromiter((e[0] for e in encoded), dtype = np.int8,    count = count_all)
+		religions   = np.fromiter((e[1] for e in encoded), dtype = np.int8,    count = count_all)
+		log_incomes = np.fromiter((e[2] for e in encoded), dtype = np.float64, count = count_all)
+		self_race, self_religion, log_self_income = encode_race_religion_income(self_value)
+		result = score_same_race_religion_income(
+			self_race,
+			self_religion,
+			log_self_income,
+			races,
+			religions,
+			log_incomes,
 		)
-		ratio_similar = count_similar / count_all if count_all != 0 else 0
-		neighbors_with_similar_income = len([
-			1 for neighbor_value in neighbor_values
-			if abs(log(neighbor_value["income"]) - log(self_value["income"])) <= 0.2  #type:ignore
-		])
-		income_friendliness_bonus = 0.5 if neighbors_with_similar_income > 0 else 0.0
-		result = ratio_same + ratio_similar + income_friendliness_bonus
 		return result
-			
+
 
 	model_config = SchellingModelConfig_Random(
 		topology      = ("Graph", Topology_GridDiagonals(grid_topo_dim)),
@@ -149,6 +167,16 @@ def example_complex_game() -> SchellingModel:
 
 
 
+def seed_everything(seed: int) -> None:
+	# one entry point for every RNG the pipeline draws from: the stdlib random
+	# module (assignments, scalar samplers), the numpy Generator behind the
+	# batch samplers, and legacy numpy global state (networkx random layouts);
+	# an expensive run that cannot be reproduced has to be run twice
+	random.seed(seed)
+	np.random.seed(seed)
+	reseed_rng(seed)
+
+
 if __name__ == '__main__':
 	if not exists(OUT_IMG_DIR):
 		mkdir(OUT_IMG_DIR)
@@ -157,7 +185,7 @@ if __name__ == '__main__':
 
 	set_nice_level(19)
 	if SEED is not None:
-		random.seed(SEED)
+		seed_everything(SEED)
 	model1 = example_simple_game()
 	model2 = example_complex_game()
 	SchellingApp(model2).run()
@@ -1,24 +1,28 @@
 from __future__ import annotations
-from typing import Union, Iterable, cast
+from typing import Any, Union, Iterable, cast
 from dataclasses import dataclass
-from threading import Thread, Lock
-from time import sleep
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+import os
 import random
 
 
-from matplotlib.pyplot import Figure, subplots
-from networkx          import draw
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.colors import to_rgba
+from networkx          import draw, relabel_nodes
 
 from src.types import (
 	GraphType,
 	GraphType_Literal,
 	NodeID,
 	NodePosDict,
+	AgentID,
 	AgentType_Name,
+	AgentType_Value,
 	AgentType_Value_Discrete,
 	AgentType_Value_Continuous,
 	AgentType_Vector,
-	AgentType_ValueConstraint,
 	AgentType_VectorConstraint,
 	AgentType_Domain,
 	AgentType_Constraints,
@@ -29,6 +33,7 @@ from src.types import (
 	AgentType_Nature,
 	Assignment,
 	Utility_Scalarized,
+	Utility_Scalarized_Ids,
 	MovementMode,
 	DomainFigureHistories,
 	ConfiguredFigureHistories,
@@ -37,23 +42,51 @@ from src.types import (
 from src.topology import (
 	Topology,
 	TopologyType,
+	TopologyConfig_Explicit,
 	TopologyConfig_Generated,
 )
+from src import distributions as distributions_module
 from src.distributions import (
 	AgentType_Distributions,
-	DistributionGenerator,
-	DomainDistributions,
-	distribution_type_to_generator,
+	BatchGenerator,
+	distribution_type_to_batch_generator,
 )
 from src.agent           import Agent
-from src.utility         import get_default_utility_scalarized_function
+from src.kernels         import warmup_kernels
+from src.store           import AgentStore, build_vector_class
+from src.utility         import (
+	get_default_utility_scalarized_function,
+	get_default_utility_scalarized_store_function,
+)
 from src.colors          import get_default_colormap
-from src.config_defaults import DEFAULT_FIGSIZE, DEFAULT_DPI, DEFAULT_ANTILAG_SLEEP
+from src.config_defaults import DEFAULT_FIGSIZE, DEFAULT_DPI
 
 
 
 GRAPH_HISTORY_MUTEX = Lock()
 
+
+class IndexedNodeList(list):
+	"""
+	List with O(1) remove-by-value (swap-pop through a node -> index map), for
+	the per-step free/occupied node pools: the move loop removes one node per
+	moving agent, which was an O(k) scan on a plain list. Staying a list keeps
+	random.choice, iteration and numpy conversion on the native fast paths.
+	"""
+	def __init__(self, nodes: Iterable[NodeID]):
+		super().__init__(nodes)
+		self.index_of : dict[NodeID, int] = { node: i for i, node in enumerate(self) }
+
+	def remove(self, node: NodeID) -> None:
+		i    = self.index_of.pop(node)
+		last = super().pop()
+		if i < len(self):
+			self[i] = last
+			self.index_of[last] = i
+
+	def __contains__(self, node: object) -> bool:
+		return node in self.index_of
+
 #TODO provide trackability for utility criteria when possible, not just scalarized (?)
 @dataclass
 class SchellingModelConfig_Explicit:
@@ -98,75 +131,97 @@ class SchellingModel:
 		self.is_valid   : AgentType_Constraints
 		self.utility    : Utility_Scalarized
 		self.agents     : list[Agent]
+		self.store      : AgentStore
+		self.utility_ids: Utility_Scalarized_Ids | None
 		self.max_iter   : int
 		self.history    : list[Assignment]
 		self.colormap   : AgentType_ColorMap
 		self.social_net : GraphType | None
 		self.figures	: ConfiguredFigureHistories
 		self.nodes_pos  : NodePosDict
-		match config:
-			case SchellingModelConfig_Explicit(
-				topology,
-				agents,
-				domain,
-				move_mode,
-				constraints,
-				utility,
-				assignment,
-				max_iter,
-				colormap,
-				social_net,
-				node_pos,
-			):
-				self.topology   = topology
-				self.domain     = domain
-				self.move_mode  = move_mode if move_mode is not None else "jump"
-				self.is_valid   = constraints if constraints is not None else SchellingModel.get_is_valid(domain)
-				self.max_iter   = max_iter
-				self.utility	= utility if utility is not None else get_default_utility_scalarized_function(domain)
-				self.history    = [assignment] if assignment is not None else [self.get_random_assignment(len(agents))]
-				self.agents     = agents
-				self.colormap   = get_default_colormap(domain, colormap)
-				self.social_net = social_net
-				self.nodes_pos  = self.topology.get_layout(self.topology.graph) if node_pos is None else node_pos
-			case SchellingModelConfig_Random(
-				topology,
-				n_agents,
-				agent_natures,
-				happiness_threshold,
-				domain,
-				move_mode,
-				constraints,
-				utility,
-				distributions,
-				max_iter,
-				colormap,
-				social_net,
-				node_pos,
-			):
-				self.topology   = Topology(TopologyConfig_Generated(*topology))
-				self.domain     = domain
-				self.move_mode  = move_mode if move_mode is not None else "jump"
-				self.is_valid   = constraints if constraints is not None else SchellingModel.get_is_valid(domain)
-				self.max_iter   = max_iter
-				self.utility    = utility if utility is not None else get_default_utility_scalarized_function(domain)
-				self.history    = [self.get_random_assignment(n_agents)]
-				self.agents     = self.generate_agents(n_agents, distributions, agent_natures, happiness_threshold)
-				self.colormap   = get_default_colormap(domain, colormap)
-				self.social_net = social_net
-				self.nodes_pos  = self.topology.get_layout(self.topology.graph) if node_pos is None else node_pos
-			case _:
-				raise ValueError("Invalid SchellingModelConfig")
+		self.rev_assignment : dict[NodeID, int]
+		self.node_to_agent  : np.ndarray
+		self.unhappy_ids    : list[AgentID]
+		self.proposal_targets : list[NodeID]
+		self.occupied_by_value : dict[tuple, list[NodeID]]
+		# direct attribute access instead of positional case destructuring:
+		# 12-field-wide __match_args__ patterns silently rebind everything when
+		# a config dataclass gains or reorders a field
+		if not isinstance(config, (SchellingModelConfig_Explicit, SchellingModelConfig_Random)):
+			raise ValueError("Invalid SchellingModelConfig")
+		self.domain     = config.domain
+		self.move_mode  = config.move_mode if config.move_mode is not None else "jump"
+		self.is_valid   = config.constraints if config.constraints is not None else SchellingModel.get_is_valid(config.domain)
+		self.max_iter   = config.max_iter
+		self.utility    = config.utility if config.utility is not None else get_default_utility_scalarized_function(config.domain)
+		self.colormap   = get_default_colormap(config.domain, config.colormap)
+		self.social_net = config.social_net
+		# original node labels of a relabeled explicit graph, indexed by the
+		# dense node id, for callers that render or export the labels
+		self.node_labels : list | None = None
+		node_pos = config.node_pos
+		if isinstance(config, SchellingModelConfig_Explicit):
+			self.topology   = config.topology
+			self.agents     = config.agents
+			assignment      = config.assignment
+			if self.topology.csr_indptr is None:
+				# explicit graphs may arrive with arbitrary hashable labels;
+				# relabel once to dense ints so assignments stay int32 arrays
+				# and the CSR fast paths apply, remapping everything label-keyed
+				self.node_labels = list(self.topology.graph.nodes())
+				label_to_index   = { label: i for i, label in enumerate(self.node_labels) }
+				self.topology    = Topology(TopologyConfig_Explicit(
+					relabel_nodes(self.topology.graph, label_to_index),
+					config.topology.layout_function,
+				))
+				if assignment is not None:
+					assignment = (
+						{ agent_id: label_to_index[node] for agent_id, node in assignment.items() }
+						if isinstance(assignment, dict) else
+						[label_to_index[node] for node in assignment]
+					)
+				if node_pos is not None:
+					node_pos = { label_to_index[label]: pos for label, pos in node_pos.items() }
+				for agent in self.agents:
+					if agent.graph_pos in label_to_index:
+						agent.graph_pos = label_to_index[agent.graph_pos]
+			self.history    = [SchellingModel.to_assignment(assignment)] if assignment is not None else [self.get_random_assignment(len(config.agents))]
+		else:
+			self.topology   = Topology(TopologyConfig_Generated(*config.topology))
+			self.history    = [self.get_random_assignment(config.n_agents)]
+			self.agents     = self.generate_agents(config.n_agents, config.distributions, config.agent_natures, config.happiness)
+		self.nodes_pos  = self.topology.get_layout(self.topology.graph) if node_pos is None else node_pos
 		if len(self.agents) > len(self.topology.graph.nodes()):
 			raise ValueError("SchellingModel.__init__(): Not enough nodes for all agents")
 		self.equilibrium_found = False
+		# per-iteration logging costs O(n_agents) string formatting plus a
+		# synchronous terminal write per step; off by default, flip on the
+		# instance when debugging a run
+		self.verbose = False
+		# append-only history storage: one preallocated (max_iter+1, n_agents)
+		# block written row by row; self.history keeps its list-of-steps API but
+		# holds views into this block instead of per-step allocations
+		self.history_arr = np.full((self.max_iter + 1, len(self.agents)), -1, dtype = np.int32)
+		self.history_arr[0] = self.history[0]
+		self.history        = [self.history_arr[0]]
+		self.store       = AgentStore(self.domain, self.agents)
+		# the SoA fast path only matches the default utility; custom ones keep the dict path
+		self.utility_ids = get_default_utility_scalarized_store_function(self.store) if config.utility is None else None
+		if self.utility_ids is not None:
+			warmup_kernels()
 		self.update_agents_with_assignment(self.history[-1])
+		# seed real utilities once so the first step's moves are not all driven
+		# by the -1 placeholder; steps after that reuse selection-time values
+		self.refresh_utilities()
 		self.figures = {
 			"N_edge_N_label" : {},
 			"N_edge_Y_label" : {},
 			"Y_edge_N_label" : {},
 			"Y_edge_Y_label" : {},
 		}
+		# reverse maps of past history rows, built lazily by get_figure and
+		# shared across the four render configs
+		self.rev_history : dict[int, dict[NodeID, int]] = {}
 
 
 	@staticmethod
@@ -174,37 +229,39 @@ class SchellingModel:
 		domain            : AgentType_Domain,
 		extra_constraints : list[AgentType_VectorConstraint] | None = None,
 	) -> AgentType_Constraints:
-		def discrete_lambda_builder(bounds: list[AgentType_Value_Discrete]) -> AgentType_ValueConstraint:
-			def is_criterion_valid_discrete(s: AgentType_Value_Discrete) -> bool:
-				return s in bounds
-			return is_criterion_valid_discrete
-
-		def continuous_lambda_builder(bounds: tuple[AgentType_Value_Continuous, AgentType_Value_Continuous]) -> AgentType_ValueConstraint:
-			def is_criterion_valid_continuous(x: AgentType_Value_Continuous) -> bool:
-				return bounds[0] <= x and x <= bounds[1]
-			return is_criterion_valid_continuous
-
-		lambdas : dict[AgentType_Name, AgentType_ValueConstraint] = {}
+		# flat membership tables instead of one closure per type: the checks
+		# below run without per-field function-call indirection, and hashed
+		# set membership replaces the linear list scan for discrete types
+		discrete_sets : dict[AgentType_Name, frozenset] = {}
+		ranges        : dict[AgentType_Name, tuple[AgentType_Value_Continuous, AgentType_Value_Continuous]] = {}
 		for type_name, bounds in domain.items():
-			if   isinstance(bounds, list  ):  lambdas[type_name] = discrete_lambda_builder(bounds)
-			elif isinstance(bounds, tuple ):  lambdas[type_name] = continuous_lambda_builder(bounds)
+			if   isinstance(bounds, list  ):  discrete_sets[type_name] = frozenset(bounds)
+			elif isinstance(bounds, tuple ):  ranges[type_name] = bounds
 			else:
 				raise ValueError(f"Invalid domain value '{bounds}'")
 
-		def is_valid(domain: AgentType_Domain, value: AgentType_Vector) -> bool:
-			for type_name, subvalue in value.items():
-				constraint = lambdas[type_name]
-				if not constraint(subvalue):
-					print(f"Failed constraint {constraint} for '{type_name}' with value '{subvalue}'")
-					return False
-			if extra_constraints:
-				for constraint in extra_constraints:
-					if not constraint(value):
-						print(f"Failed extra constraint {constraint}")
-						return False
-			return True
-
-		return is_valid
+		def fail(type_name: AgentType_Name, subvalue: AgentType_Value) -> bool:
+			print(f"Failed constraint for '{type_name}' with value '{subvalue}'")
+			return False
+
+		# the domain keys are fixed at model creation: specialize the validator
+		# into a straight-line function with the checks unrolled per key
+		# (runtime codegen, same idiom as the scalarized utility)
+		namespace : dict[str, Any] = { "fail": fail, "extra_constraints": extra_constraints }
+		lines     = ["def is_valid(domain, value):"]
+		for i, (type_name, members) in enumerate(discrete_sets.items()):
+			namespace[f"set_{i}"] = members
+			lines.append(f"\tif value[{type_name!r}] not in set_{i}: return fail({type_name!r}, value[{type_name!r}])")
+		for type_name, (lower, upper) in ranges.items():
+			lines.append(f"\tif not ({lower!r} <= value[{type_name!r}] <= {upper!r}): return fail({type_name!r}, value[{type_name!r}])")
+		if extra_constraints:
+			lines.append("\tfor constraint in extra_constraints:")
+			lines.append("\t\tif not constraint(value):")
+			lines.append("\t\t\tprint(f\"Failed extra constraint {constraint}\")")
+			lines.append("\t\t\treturn False")
+		lines.append("\treturn True")
+		exec("\n".join(lines), namespace)
+		return namespace["is_valid"]
 
 	def generate_agents(
 		self,
@@ -213,17 +270,18 @@ class SchellingModel:
 		agent_natures : AgentType_NatureProportions | None = None,
 		happiness     : float                       | None = None,
 	) -> list[Agent]:
-		def match_default_distribution(v: AgentType_Categories | AgentType_Range) -> DistributionGenerator:
-			if   isinstance(v, list ):  result = lambda : random.choice(v)
-			elif isinstance(v, tuple):  result = lambda : random.uniform(v[0], v[1])
+		def match_default_distribution(v: AgentType_Categories | AgentType_Range) -> BatchGenerator:
+			# RNG is read through the module so reseed_rng() rebinding applies
+			if   isinstance(v, list ):  result = lambda n : distributions_module.RNG.choice(np.asarray(v), size = n)
+			elif isinstance(v, tuple):  result = lambda n : distributions_module.RNG.uniform(v[0], v[1], n)
 			else:
 				raise ValueError(f"match_default_distribution(): Invalid domain value '{v}'")
 			return result
 
 		def setup_distributions(
 			distributions : AgentType_Distributions | None,
-		) -> DomainDistributions:
-			safe_distributions : DomainDistributions = {
+		) -> dict[AgentType_Name, BatchGenerator]:
+			safe_distributions : dict[AgentType_Name, BatchGenerator] = {
 				k: match_default_distribution(v)
 				for k, v in self.domain.items()
 			}
@@ -231,11 +289,12 @@ class SchellingModel:
 				for k, v in distributions.items():
 					if k not in self.domain:
 						raise ValueError(f"setup_distributions(): Invalid distribution key '{k}'")
-					safe_distributions[k] = distribution_type_to_generator(v)
+					safe_distributions[k] = distribution_type_to_batch_generator(v)
 			return safe_distributions
 
 		result : list[Agent] = []
 		safe_distributions = setup_distributions(distributions)
+		vector_class       = build_vector_class(self.domain)
 		natures : list[AgentType_Nature]
 		if agent_natures:
 			natures = random.choices( # type:ignore
@@ -245,83 +304,221 @@ class SchellingModel:
 			)
 		else:
 			natures = ["random"] * n
+		# one vectorized draw per type-axis instead of n scalar RNG calls each
+		columns = { k: generator(n) for k, generator in safe_distributions.items() }
 		for i in range(n):
-			value : AgentType_Vector = { k: v() for k, v in safe_distributions.items() }
+			value : AgentType_Vector = vector_class({ k: column[i].item() for k, column in columns.items() })  # type:ignore
 			agent = Agent(i, value, self.domain, self.is_valid, self.move_mode, natures[i], happiness=happiness)
 			result.append(agent)
 		return result
 
+	@staticmethod
+	def to_assignment(assignment: Assignment | dict[int, NodeID]) -> Assignment:
+		# accepts the legacy dict form for explicit configs, stores an int32 array
+		if isinstance(assignment, dict):
+			return np.fromiter(
+				(assignment[agent_id] for agent_id in range(len(assignment))),
+				dtype = np.int32,
+				count = len(assignment),
+			)
+		return np.asarray(assignment, dtype = np.int32)
+
 	def get_random_assignment(self, agent_amount : int) -> Assignment:
-		result : Assignment = {}
-		available_nodes = list(self.topology.graph.nodes())
-		for agent_id in range(agent_amount):
-			node = random.choice(available_nodes)
-			available_nodes.remove(node)
-			result[agent_id] = node
+		# one O(n) sample-without-replacement instead of the old O(n^2)
+		# choose-then-remove loop
+		picked = random.sample(list(self.topology.graph.nodes()), agent_amount)
+		result = np.asarray(picked, dtype = np.int32)
 		return result
 
 	def update_agents_with_assignment(self, assignment: Assignment) -> None:
+		self.store.set_positions(assignment)
+		for agent in self.agents:
+			agent.graph_pos = int(assignment[agent.id])
+		# rebuilt once per step: moves are decided against the frozen previous
+		# assignment, so every utility call in the step can share this map
+		# instead of rebuilding an O(n_agents) dict per node evaluation
+		self.rev_assignment = {
+			int(node_id): agent_id
+			for agent_id, node_id in enumerate(assignment)
+		}
+		self.node_to_agent = self.get_node_to_agent_array()
+		if self.utility_ids is not None:
+			# the new occupancy re-keys every sorted-bucket memo entry, so the
+			# old ones would never be hit again and only grow the cache
+			self.utility_ids.clear_cache()  # type:ignore
+
+	def refresh_utilities(self) -> None:
+		"""
+		Recomputes every agent's current utility in one vectorized sweep: a
+		single (n_agents, max_degree) gather through the neighbor matrix, then
+		one masked compare-and-sum per type, instead of one Python utility call
+		per agent. Falls back to the per-agent loop for custom utilities and
+		non-dense topologies.
+		"""
+		if self.utility_ids is None or self.topology.neighbor_matrix is None:
+			for agent in self.agents:
+				agent.update_utility_current(self, self.social_net)
+			return
+		occupants = self.node_to_agent[self.topology.neighbor_matrix[self.store.positions]]
+		occupied  = occupants >= 0
+		count_all = occupied.sum(axis = 1)
+		values, discrete_flags, range_dists = self.store.as_matrix()
+		# padded/free slots gather agent 0's value but are masked back out below
+		safe_ids = np.where(occupied, occupants, 0)
+		totals   = np.zeros(len(self.agents), dtype = np.float64)
+		for t in range(values.shape[0]):
+			column        = values[t]
+			neighbor_vals = column[safe_ids]
+			if discrete_flags[t] != 0:
+				matches = neighbor_vals == column[:, None]
+			else:
+				matches = np.abs(neighbor_vals - column[:, None]) <= range_dists[t]
+			totals += (matches & occupied).sum(axis = 1)
+		utilities = np.where(count_all > 0, totals / np.maximum(count_all, 1), 0.0)
 		for agent in self.agents:
-			agent.graph_pos = assignment[agent.id]
+			agent.v_utility = float(utilities[agent.id])
+
+	def get_node_to_agent_array(self) -> np.ndarray:
+		# dense NodeID -> AgentID map for the current step, -1 for free nodes;
+		# one extra trailing slot stays -1 so the neighbor matrix's padding
+		# index (n_nodes) reads as "free" without any masking
+		result = np.full(len(self.topology.graph) + 1, -1, dtype = np.int32)
+		result[self.history[-1]] = np.arange(len(self.history[-1]), dtype = np.int32)
+		return result
 
 	def get_free_nodes(self) -> list[NodeID]:
-		occupied = self.history[-1].values()
-		result : list[NodeID] = [  # type:ignore
-			node
-			for node in self.topology.graph.nodes()
-			if node not in occupied
-		]
+		# single vectorized scan of the dense occupancy array (the trailing
+		# sentinel slot is not a real node, hence the slice)
+		result : list[NodeID] = np.where(self.node_to_agent[:-1] < 0)[0].tolist()
 		return result
 
 	def get_occupied_nodes(self) -> list[NodeID]:
-		result = list(self.history[-1].values())
+		result = self.history[-1].tolist()
 		return result
 
 	def get_next_step(self) -> Assignment:
-		current_state  = self.history[-1].copy()
-		free_nodes     = self.get_free_nodes()
-		occupied_nodes = self.get_occupied_nodes()
-		new_assignment = {}
+		current_state  = self.history[-1]
+		step_index     = len(self.history)
+		if step_index >= self.history_arr.shape[0]:
+			# only reachable when run() is invoked again after completion
+			self.history_arr = np.concatenate([self.history_arr, np.full_like(self.history_arr, -1)])
+		new_state = self.history_arr[step_index]
+		np.copyto(new_state, current_state)
+		free_nodes = IndexedNodeList(self.get_free_nodes())
+		# two-phase step: every agent proposes a target against the frozen
+		# previous assignment (pure reads, so proposals parallelize), then a
+		# serial commit pass resolves conflicts in the same first-come
+		# first-serve agent order as before; a contested target now means the
+		# loser stays put for the step instead of rescanning a shrunken pool
 		if self.move_mode == "jump" or self.move_mode == "max_jump":
+			proposals = self.get_move_proposals(free_nodes, [])
+			# kept for the post-commit recompute: an agent whose proposal loses
+			# conflict resolution cached the utility of a node it never reached
+			self.proposal_targets = proposals
 			for agent in self.agents:
-				new_node = agent.get_move(self, free_nodes, [], self.social_net)
-				new_assignment[agent.id] = new_node
-				if new_node != agent.graph_pos:
+				new_node = proposals[agent.id]
+				if new_node != agent.graph_pos and new_node in free_nodes:
 					free_nodes.remove(new_node)
-				if len(free_nodes) == 0:
-					break
+					new_state[agent.id] = new_node
 		elif self.move_mode == "swap" or self.move_mode == "max_swap":
+			# built once per step for the random-nature swap branch, which
+			# previously rescanned all agents on every single proposal
+			self.unhappy_ids = [
+				agent.id
+				for agent in self.agents
+				if agent.v_utility < agent.happiness
+			]
+			# occupied nodes grouped by resident value vector: strategic swap
+			# scans only consider differently-valued partners, so the
+			# per-candidate equality filter moves out of the inner loops
+			self.occupied_by_value = {}
 			for agent in self.agents:
-				new_node = agent.get_move(self, [], occupied_nodes, self.social_net)
-				swap_partner = self.agents[current_state[new_node]]
-				new_assignment[agent.id] = new_node
-				new_assignment[swap_partner.id] = agent.graph_pos
-				if new_node != agent.graph_pos:
-					occupied_nodes.remove(new_node)
-					occupied_nodes.remove(agent.graph_pos)
-				if len(occupied_nodes) < 2:
-					break
-		current_state.update(new_assignment)
-		result = current_state
+				self.occupied_by_value.setdefault(self.store.value_key(agent.id), []).append(agent.graph_pos)
+			# the occupied pool stays empty: swap candidates come pre-grouped
+			# from occupied_by_value, so no swap path reads the parameter
+			proposals = self.get_move_proposals([], [])
+			self.proposal_targets = proposals
+			swapped : set[int] = set()
+			for agent in self.agents:
+				new_node = proposals[agent.id]
+				if new_node == agent.graph_pos:
+					continue
+				# resolve the actual occupant of the proposed node under the
+				# frozen previous assignment (current_state maps agent -> node,
+				# so indexing it by node would pick an unrelated agent)
+				swap_partner = self.agents[self.node_to_agent[new_node]]
+				if agent.id in swapped or swap_partner.id in swapped:
+					continue
+				new_state[agent.id]        = new_node
+				new_state[swap_partner.id] = agent.graph_pos
+				swapped.add(agent.id)
+				swapped.add(swap_partner.id)
+		# the assignment must stay injective over nodes: a conflicting commit
+		# should fail loudly here, not as silent double occupancy downstream
+		assert len(np.unique(new_state)) == new_state.size, \
+			"get_next_step(): duplicate node occupancy after commit"
+		result = new_state
+		return result
+
+	def get_move_proposals(
+		self,
+		free_nodes     : list[NodeID],
+		occupied_nodes : list[NodeID],
+	) -> list[NodeID]:
+		# proposals run serially on purpose: threaded agents interleave their
+		# draws from the shared stdlib RNG nondeterministically, which breaks
+		# seeded reproducibility for exactly the long runs seed_everything
+		# exists for — and the heavy scoring work already happens inside the
+		# parallel scan kernel, so threads bought little under the GIL anyway
+		result = [agent.get_move(self, free_nodes, occupied_nodes, self.social_net) for agent in self.agents]
 		return result
 
 	def run(self) -> None:
 		i = 0
 		while i < self.max_iter:
-			print(f"\033[94mIteration {i}\033[0m")
-			next_step = self.get_next_step()
-			if next_step == self.history[-1]:
+			if self.verbose:
+				print(f"\033[94mIteration {i}\033[0m")
+			prev_state = self.history[-1]
+			next_step  = self.get_next_step()
+			if np.array_equal(next_step, prev_state):
 				self.equilibrium_found = True
 				self.max_iter = i
 			self.history.append(next_step)
 			self.update_agents_with_assignment(next_step)
-			print(f"Utilities: {[f'{float(agent.v_utility):.2}' for agent in self.agents]}")
+			if self.verbose:
+				print(f"Utilities: {[f'{float(agent.v_utility):.2}' for agent in self.agents]}")
+			# selection-time utility caches go stale in three ways: movers hold
+			# values computed against the pre-move assignment, agents whose
+			# neighborhood changed hold values for a neighborhood that no longer
+			# exists, and rejected proposers hold the utility of a node they
+			# never reached; recompute exactly that set (near equilibrium it
+			# shrinks to a handful of agents)
+			moved = np.where(next_step != prev_state)[0]
+			affected_nodes : set[int] = set()
+			for agent_id in moved:
+				affected_nodes.update(self.topology.neighbors_of(int(prev_state[agent_id])).tolist())
+				affected_nodes.update(self.topology.neighbors_of(int(next_step[agent_id])).tolist())
 			for agent in self.agents:
-				agent.update_utility_current(self, self.social_net)
+				if (
+					next_step[agent.id] != prev_state[agent.id]
+					or agent.graph_pos in affected_nodes
+					or self.proposal_targets[agent.id] != prev_state[agent.id]
+				):
+					agent.update_utility_current(self, self.social_net)
 			i += 1
 		print(f"Run done after {self.max_iter}")
 		print(f"Equilibrium found ? {self.equilibrium_found}")
 
+	@staticmethod
+	def get_figures_config_key(
+		with_labels : bool,
+		with_edges  : bool,
+	) -> ConfigedFigureHistories_Key:
+		# single definition of the render-state cache key: figures are kept per
+		# (edges, labels) config so flag toggles never invalidate other configs
+		result : ConfigedFigureHistories_Key = f"{'N' if with_edges else 'Y'}_edge_{'N' if with_labels else 'Y'}_label"  # type:ignore
+		return result
+
 	def get_figure(
 		self,
 		iter_step   : int,
@@ -333,53 +530,91 @@ class SchellingModel:
 		# https://networkx.org/documentation/stable/reference/drawing.html
 
 		# if the figure has already been calculated, return it
-		config_key : ConfigedFigureHistories_Key = f"{'N' if with_edges else 'Y'}_edge_{'N' if with_labels else 'Y'}_label"  # type:ignore
+		config_key = SchellingModel.get_figures_config_key(with_labels, with_edges)
 		if type_name in self.figures[config_key]:
 			if iter_step in self.figures[config_key][type_name]:
 				return self.figures[config_key][type_name][iter_step]
 		else:
 			self.figures[config_key][type_name] = {}
-		graph = self.topology.graph.copy(as_view = True)
+		graph = self.topology.graph
+		step_assignment = self.history[iter_step]
+		if step_assignment is self.history[-1]:
+			# the current step's reverse map is already maintained on the model
+			rev_assignment = self.rev_assignment
+		else:
+			# history rows are immutable once appended, so past steps' reverse
+			# maps are shared across the figure configs that render them
+			rev_assignment = self.rev_history.get(iter_step)
+			if rev_assignment is None:
+				rev_assignment = {
+					int(node_id): agent_id
+					for agent_id, node_id in enumerate(step_assignment)
+				}
+				self.rev_history[iter_step] = rev_assignment
+		# half the render configs never draw labels; skip the O(n_nodes) dict
 		labels = {
-			node_id : self.history[iter_step][node_id] if node_id in self.history[iter_step] else ""
+			node_id : rev_assignment[node_id] if node_id in rev_assignment else ""
 			for node_id in graph.nodes()
-		}
+		} if with_labels else None
 
 		# Handle colormapping
 		#TODO if type_mode == "type":
-		values = {}
-		colors = {}
-		step_assignment = self.history[iter_step]
-		rev_assignment  = {v: k for k, v in step_assignment.items()}
-		colormap = self.colormap[type_name]
-		for node_id in rev_assignment:
-			agent_id        = rev_assignment[cast(int, node_id)]
-			agent_value     = self.agents[agent_id].value[type_name]
-			values[node_id] = agent_value
+		colormap         = self.colormap[type_name]
 		type_is_discrete = isinstance(colormap, dict)
-		max_value : float = max(values.values()) if not type_is_discrete else 0.0  #type:ignore
-		min_value : float = min(values.values()) if not type_is_discrete else 0.0  #type:ignore
-		norm_value = max_value - min_value
-		for node_id in graph.nodes():
-			if node_id not in values:
-				colors[node_id] = "white"
-				continue
-			elif type_is_discrete:
-				agent_value     = values[node_id]
-				colors[node_id] = colormap[agent_value]  # type:ignore
+		if self.topology.csr_indptr is not None:
+			# dense node ids: build the whole node-ordered RGBA buffer in a few
+			# vectorized ops (free nodes stay white) instead of two Python
+			# loops of per-node dict lookups and colormap calls
+			color_arr = np.ones((len(graph), 4), dtype = np.float64)
+			column    = self.store.codes[type_name]
+			if type_is_discrete:
+				# per-category RGBA table indexed by code, then one scatter
+				table = np.asarray([
+					to_rgba(colormap[value])  # type:ignore
+					for value in self.store.decode_tables[type_name]
+				])
+				color_arr[step_assignment] = table[column]
 			else:
-				agent_value            = values[node_id] 
-				normalized_agent_value = (agent_value - min_value) / norm_value # type:ignore
-				colors[node_id]        = colormap(normalized_agent_value)  # type:ignore
-
-		fig, ax = subplots(figsize = DEFAULT_FIGSIZE, dpi = DEFAULT_DPI)
+				vals       = column.astype(np.float64)
+				min_value  = vals.min()
+				norm_value = vals.max() - min_value
+				normalized = (vals - min_value) / norm_value if norm_value > 0 else np.zeros_like(vals)
+				color_arr[step_assignment] = colormap(normalized)  # type:ignore
+			node_colors = color_arr
+		else:
+			values : dict = {}
+			colors : dict = {}
+			for node_id in rev_assignment:
+				agent_id        = rev_assignment[cast(int, node_id)]
+				agent_value     = self.agents[agent_id].value[type_name]
+				values[node_id] = agent_value
+			max_value : float = max(values.values()) if not type_is_discrete else 0.0  #type:ignore
+			min_value : float = min(values.values()) if not type_is_discrete else 0.0  #type:ignore
+			norm_value = max_value - min_value
+			for node_id in graph.nodes():
+				if node_id not in values:
+					colors[node_id] = "white"
+					continue
+				elif type_is_discrete:
+					agent_value     = values[node_id]
+					colors[node_id] = colormap[agent_value]  # type:ignore
+				else:
+					agent_value            = values[node_id]
+					normalized_agent_value = (agent_value - min_value) / norm_value # type:ignore
+					colors[node_id]        = colormap(normalized_agent_value)  # type:ignore
+			node_colors = list(colors.values())  # type:ignore
+
+		# object-oriented figure construction: no shared pyplot state, so
+		# frames can be rendered from worker threads
+		fig = Figure(figsize = DEFAULT_FIGSIZE, dpi = DEFAULT_DPI)
+		ax  = fig.add_subplot()
 		draw(
 			self.topology.graph,
 			self.nodes_pos,
 			ax          = ax,
 			with_labels = with_labels,
 			labels      = labels,
-			node_color  = list(colors.values()),
+			node_color  = node_colors,
 			edge_color  = "gray" if with_edges else "white",
 			edgecolors  = "gray",
 			node_size   = 50,
@@ -402,7 +637,6 @@ class SchellingModel:
 			type_name   : AgentType_Name,
 		) -> None:
 			print(f"Starting calc for {type_name} at iteration {iter_step}")
-			sleep(DEFAULT_ANTILAG_SLEEP)
 			self.get_figure(
 				iter_step   = iter_step,
 				type_name   = type_name,
@@ -410,18 +644,18 @@ class SchellingModel:
 				with_edges  = with_edges,
 			)
 			print(f"Completed calc for {type_name} at iteration {iter_step}")
-			sleep(DEFAULT_ANTILAG_SLEEP)
-		# TODO, if we use threading, needs to be in smaller batches
-		# threads : list[Thread] = []
-		for iter_step in range(self.max_iter + 1):
-			for type_name in type_names:
-				draw_graph(iter_step, type_name)
-		#		draw_graph_configured = lambda : draw_graph(iter_step, type_name)
-		# 		graph_thread = Thread(target=draw_graph_configured, args=())
-		# 		graph_thread.start()
-		# 		threads.append(graph_thread)
-		# for thread in threads:
-		# 	thread.join()
+		# frames are independent, and get_figure builds figures through the
+		# object-oriented API, so they render in parallel worker threads;
+		# a process pool would need a pickleable model snapshot, which the
+		# closure-based utilities rule out
+		with ThreadPoolExecutor(max_workers = os.cpu_count()) as executor:
+			futures = [
+				executor.submit(draw_graph, iter_step, type_name)
+				for iter_step in range(self.max_iter + 1)
+				for type_name in type_names
+			]
+			for future in futures:
+				future.result()
 
 
 	def get_figure_history_from_config(
@@ -429,7 +663,7 @@ class SchellingModel:
 		with_labels : bool,
 		with_edges  : bool,
 	) -> DomainFigureHistories:
-		config_key : ConfigedFigureHistories_Key = f"{'N' if with_edges else 'Y'}_edge_{'N' if with_labels else 'Y'}_label"  # type:ignore
+		config_key = SchellingModel.get_figures_config_key(with_labels, with_edges)
 		return self.figures[config_key]
 
 	# TODO
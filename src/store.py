@@ -0,0 +1,163 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.types import (
+	NodeID,
+	AgentID,
+	AgentType_Name,
+	AgentType_Value,
+	AgentType_Value_Discrete,
+	AgentType_Vector,
+	AgentType_Domain,
+)
+if TYPE_CHECKING:
+	from src.agent import Agent
+
+
+
+def build_vector_class(domain: AgentType_Domain) -> type:
+	"""
+	Generates a per-domain __slots__ class standing in for the plain-dict
+	AgentType_Vector: ~40 bytes per instance instead of ~240 for a dict, which
+	matters at agent counts where the population should stay cache-resident.
+	The mapping-style methods keep it a drop-in for dict-based callers.
+	"""
+	keys = tuple(domain.keys())
+
+	def vector_init(self, values: AgentType_Vector) -> None:
+		for key in keys:
+			setattr(self, key, values[key])
+
+	def vector_getitem(self, key: AgentType_Name) -> AgentType_Value:
+		return getattr(self, key)
+
+	def vector_setitem(self, key: AgentType_Name, value: AgentType_Value) -> None:
+		setattr(self, key, value)
+
+	def vector_contains(self, key: AgentType_Name) -> bool:
+		return key in keys
+
+	def vector_eq(self, other: object) -> bool:
+		return all(getattr(self, key) == other[key] for key in keys)  # type:ignore
+
+	def vector_repr(self) -> str:
+		return repr({ key: getattr(self, key) for key in keys })
+
+	def vector_keys(self) -> tuple[AgentType_Name, ...]:
+		return keys
+
+	def vector_items(self) -> list[tuple[AgentType_Name, AgentType_Value]]:
+		return [ (key, getattr(self, key)) for key in keys ]
+
+	# built with type() because a class body cannot close over the enclosing
+	# function's `keys` for its __slots__ assignment
+	result = type("Vector", (), {
+		"__slots__"    : keys,
+		"__init__"     : vector_init,
+		"__getitem__"  : vector_getitem,
+		"__setitem__"  : vector_setitem,
+		"__contains__" : vector_contains,
+		"__eq__"       : vector_eq,
+		"__repr__"     : vector_repr,
+		"keys"         : vector_keys,
+		"items"        : vector_items,
+	})
+	return result
+
+
+class AgentStore:
+	"""
+	Structure-of-Arrays mirror of the agent population: one contiguous numpy
+	array per agent type (integer category codes for discrete types, floats
+	for continuous ones), plus an array mapping AgentID -> NodeID. Utility
+	criteria can then run as vectorized numpy ops over neighbor-index slices
+	instead of chasing one Python dict per neighbor.
+	"""
+	def __init__(self, domain: AgentType_Domain, agents: list[Agent]):
+		self.domain        : AgentType_Domain = domain
+		self.code_tables   : dict[AgentType_Name, dict[AgentType_Value_Discrete, int]] = {}
+		self.decode_tables : dict[AgentType_Name, list[AgentType_Value_Discrete]]      = {}
+		self.codes         : dict[AgentType_Name, np.ndarray] = {}
+		self.positions     : np.ndarray = np.full(len(agents), -1, dtype = np.int32)
+		for type_name, bounds in domain.items():
+			if isinstance(bounds, list):
+				table = { value: code for code, value in enumerate(bounds) }
+				self.code_tables  [type_name] = table
+				self.decode_tables[type_name] = list(bounds)
+				# int8 keeps the whole agent table cache-resident; domains with
+				# more categories than int8 can hold fall back to int32
+				code_dtype = np.int8 if len(bounds) <= 127 else np.int32
+				self.codes        [type_name] = np.fromiter(
+					(table[agent.value[type_name]] for agent in agents),
+					dtype = code_dtype,
+					count = len(agents),
+				)
+			else:
+				self.codes[type_name] = np.fromiter(
+					(agent.value[type_name] for agent in agents),
+					dtype = np.float32,
+					count = len(agents),
+				)
+		for agent in agents:
+			self.positions[agent.id] = agent.graph_pos
+		self.matrix : tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+
+	def encode(self, type_name: AgentType_Name, value: AgentType_Value) -> int | float:
+		if type_name in self.code_tables:
+			return self.code_tables[type_name][value]  # type:ignore
+		return float(value)  # type:ignore
+
+	def decode(self, type_name: AgentType_Name, code: int | float) -> AgentType_Value:
+		if type_name in self.decode_tables:
+			return self.decode_tables[type_name][int(code)]
+		return float(code)
+
+	def vector_of(self, agent_id: AgentID) -> AgentType_Vector:
+		# decoded dict view, for legacy callers that still want AgentType_Vector
+		result : AgentType_Vector = {
+			type_name: self.decode(type_name, self.codes[type_name][agent_id])
+			for type_name in self.codes
+		}
+		return result
+
+	def values_equal(self, a_id: AgentID, b_id: AgentID) -> bool:
+		# whole-vector equality over the coded columns: small-int compares
+		# instead of hashing and comparing the category strings
+		for column in self.codes.values():
+			if column[a_id] != column[b_id]:
+				return False
+		return True
+
+	def value_key(self, agent_id: AgentID) -> tuple:
+		# hashable whole-vector key over the coded columns, for grouping
+		# agents with identical values
+		return tuple(column[agent_id].item() for column in self.codes.values())
+
+	def gather(self, type_name: AgentType_Name, agent_ids: np.ndarray) -> np.ndarray:
+		# single vectorized gather of neighbor values for one type
+		return self.codes[type_name][agent_ids]
+
+	def set_position(self, agent_id: AgentID, node_id: NodeID) -> None:
+		self.positions[agent_id] = node_id
+
+	def set_positions(self, assignment: np.ndarray) -> None:
+		# one vectorized copy instead of n scalar set_position calls
+		self.positions[:] = assignment
+
+	def as_matrix(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+		# cached float32 matrix of all type columns (one row per type), with
+		# per-type discrete flags and range distances, for the scan kernels;
+		# agent values are immutable so this is built once
+		if self.matrix is None:
+			keys           = list(self.codes.keys())
+			values         = np.stack([self.codes[key].astype(np.float32) for key in keys])
+			discrete_flags = np.fromiter(
+				(1 if key in self.code_tables else 0 for key in keys),
+				dtype = np.int8,
+				count = len(keys),
+			)
+			range_dists = np.ones(len(keys), dtype = np.float32)
+			self.matrix = (values, discrete_flags, range_dists)
+		return self.matrix
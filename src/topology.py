@@ -1,9 +1,10 @@
-from typing import Union
+from typing import Union, Callable
 from dataclasses import dataclass
 
+import numpy as np
 import networkx as nx
 
-from .types import GraphType, GraphType_Literal, LayoutFunction
+from .types import GraphType, GraphType_Literal, LayoutFunction, NodePosDict
 
 
 
@@ -131,78 +132,267 @@ TopologyConfig = Union[
 	TopologyConfig_Generated,
 ]
 
+def build_integer_grid(
+	dimensions     : tuple[int, int],
+	with_diagonals : bool = False,
+	periodic       : bool = False,
+) -> GraphType:
+	# builds the grid directly over linear indices i = row * width + col,
+	# avoiding the tuple-keyed nx.grid_graph + full relabel_nodes copy; the
+	# endpoint arrays come out of whole-array index arithmetic, with no
+	# per-node Python branching
+	width, height = dimensions
+	n_nodes = width * height
+	index   = np.arange(n_nodes, dtype = np.int64)
+	col     = index % width
+	sources : list[np.ndarray] = []
+	targets : list[np.ndarray] = []
+
+	def link(mask: np.ndarray, offset: int) -> None:
+		sources.append(index[mask])
+		targets.append(index[mask] + offset)
+
+	has_right = col < width - 1
+	has_down  = index + width < n_nodes
+	link(has_right, 1)
+	link(has_down, width)
+	if with_diagonals:
+		link(has_right          & has_down, width + 1)
+		link((col > 0)          & has_down, width - 1)
+	if periodic:
+		# wrap each row's last column back to its first, and the bottom row
+		# back to the top; 1-wide axes have nothing to wrap (a self-loop) and
+		# duplicate edges on 2-wide axes are absorbed by nx.Graph
+		if width  > 1:  link(col   == width - 1,           -(width - 1))
+		if height > 1:  link(index >= (height - 1) * width, -(height - 1) * width)
+	result = nx.Graph()
+	result.add_nodes_from(range(n_nodes))
+	result.add_edges_from(zip(
+		np.concatenate(sources).tolist(),
+		np.concatenate(targets).tolist(),
+	))
+	return result
+
+# above this edge probability the O(n^2) Bernoulli mask is cheaper than
+# geometric gap skipping (and its memory is bounded by the pair count anyway)
+ERDOS_RENYI_DENSE_THRESHOLD = 0.25
+
+def build_erdos_renyi(nodes: int, probability: float) -> GraphType:
+	# replaces nx.erdos_renyi_graph's per-pair Python coin flips: dense
+	# probabilities draw one Bernoulli mask over the upper triangle, sparse
+	# ones draw vectorized geometric gaps between successful pairs, so work
+	# scales with the edges that exist rather than all n*(n-1)/2 pairs
+	result = nx.Graph()
+	result.add_nodes_from(range(nodes))
+	pairs = nodes * (nodes - 1) // 2
+	if pairs == 0 or probability <= 0.0:
+		return result
+	if probability >= 1.0:
+		return nx.complete_graph(nodes)
+	if probability >= ERDOS_RENYI_DENSE_THRESHOLD:
+		row, col = np.triu_indices(nodes, k = 1)
+		mask = np.random.random(pairs) < probability
+		result.add_edges_from(zip(row[mask].tolist(), col[mask].tolist()))
+		return result
+	# linearized upper triangle, row-major: row i starts at i*(2n - i - 1)/2;
+	# geometric gaps are >= 1, so the hit indices are strictly increasing
+	position = -1
+	hits : list[np.ndarray] = []
+	batch = max(int(pairs * probability) + 1, 1024)
+	while position < pairs:
+		gaps = np.random.geometric(probability, size = batch)
+		index = position + np.cumsum(gaps)
+		hits.append(index)
+		position = int(index[-1])
+	linear = np.concatenate(hits)
+	linear = linear[linear < pairs]
+	# decode with exact integer math against the row start offsets instead of
+	# a float sqrt inversion (which goes off by one near row boundaries)
+	starts = np.arange(nodes - 1, dtype = np.int64) * (2 * nodes - np.arange(nodes - 1, dtype = np.int64) - 1) // 2
+	row    = np.searchsorted(starts, linear, side = "right") - 1
+	col    = linear - starts[row] + row + 1
+	result.add_edges_from(zip(row.tolist(), col.tolist()))
+	return result
+
+
+def build_barabasi_albert(nodes: int, edges: int) -> GraphType:
+	# preferential attachment over a preallocated numpy buffer holding one
+	# entry per edge endpoint (a node's multiplicity there is its degree, so
+	# uniform draws from the buffer are degree-proportional); nx grows the
+	# equivalent list by repeated extend and samples it one call at a time
+	if edges < 1 or edges >= nodes:
+		raise ValueError(f"build_barabasi_albert(): need 1 <= edges < nodes, got edges={edges}, nodes={nodes}")
+	result = nx.Graph()
+	result.add_nodes_from(range(nodes))
+	repeated = np.empty(2 * edges * (nodes - edges), dtype = np.int64)
+	head     = 0
+	targets  = list(range(edges))
+	for source in range(edges, nodes):
+		result.add_edges_from((source, target) for target in targets)
+		repeated[head : head + edges] = targets
+		head += edges
+		repeated[head : head + edges] = source
+		head += edges
+		# draw attachment targets in batches; rejection of duplicates keeps
+		# the m targets distinct, same as nx's _random_subset
+		chosen : set[int] = set()
+		while len(chosen) < edges:
+			draws = repeated[np.random.randint(0, head, edges - len(chosen))]
+			chosen.update(draws.tolist())
+		targets = list(chosen)
+	return result
+
+
+def build_planar_unsupported(topology_type: Topology_Planar) -> GraphType:
+	raise NotImplementedError("Topology.generate_graph(): Topology_Planar")
+
+
+# kamada_kawai_layout runs an O(n^2) pairwise-distance L-BFGS optimization
+# that dominates setup for large grids; above this node count the layout
+# drops to spring_layout, which is near-lattice on grids anyway (seeded, so
+# the fallback stays reproducible independently of the simulation RNGs)
+KAMADA_KAWAI_MAX_NODES = 500
+
+def layout_kamada_kawai_capped(graph: GraphType) -> NodePosDict:
+	if graph.number_of_nodes() <= KAMADA_KAWAI_MAX_NODES:
+		return nx.kamada_kawai_layout(graph)
+	return nx.spring_layout(graph, seed = 0)
+
+
+GRAPH_TYPE_BUILDERS : dict[GraphType_Literal, Callable] = {
+	"Graph"        : nx.Graph,
+	"DiGraph"      : nx.DiGraph,
+	"MultiGraph"   : nx.MultiGraph,
+	"MultiDiGraph" : nx.MultiDiGraph,
+}
+
+# O(1) dispatch tables keyed by topology dataclass, replacing the per-call
+# match/case cascades of isinstance checks
+TOPOLOGY_GRAPH_BUILDERS : dict[type, Callable[..., GraphType]] = {
+	Topology_Line                 : lambda t: nx.path_graph(t.length),
+	Topology_Grid                 : lambda t: build_integer_grid(t.dimensions),
+	Topology_GridDiagonals        : lambda t: build_integer_grid(t.dimensions, True),
+	Topology_Cube                 : lambda t: nx.grid_graph(dim=t.dimensions),
+	Topology_Ring                 : lambda t: nx.cycle_graph(t.length),
+	Topology_Star                 : lambda t: nx.star_graph(t.outer_nodes),
+	Topology_Planar               : build_planar_unsupported,
+	Topology_Clique               : lambda t: nx.complete_graph(t.nodes),
+	Topology_Torus                : lambda t: build_integer_grid(t.dimensions, periodic=True),
+	Topology_Hypertorus           : lambda t: nx.grid_graph(dim=t.dimensions, periodic=True),
+	Topology_RandomTree           : lambda t: nx.random_tree(t.nodes),
+	Topology_RandomErdosRenyi     : lambda t: build_erdos_renyi(t.nodes, t.probability),
+	Topology_RandomBarabasiAlbert : lambda t: build_barabasi_albert(t.nodes, t.edges),
+	Topology_RandomWattsStrogatz  : lambda t: nx.watts_strogatz_graph(t.nodes, t.edges, t.rewiring_probability),
+}
+
+TOPOLOGY_LAYOUTS : dict[type, LayoutFunction] = {
+	Topology_Line                 : nx.spring_layout,
+	Topology_Grid                 : layout_kamada_kawai_capped,
+	Topology_GridDiagonals        : layout_kamada_kawai_capped,
+	Topology_Cube                 : nx.fruchterman_reingold_layout,
+	Topology_Ring                 : nx.spring_layout,
+	Topology_Star                 : nx.spring_layout,
+	Topology_Planar               : nx.spring_layout,
+	Topology_Clique               : nx.spring_layout,
+	Topology_Torus                : nx.fruchterman_reingold_layout,
+	Topology_Hypertorus           : nx.fruchterman_reingold_layout,
+	Topology_RandomTree           : nx.spring_layout,
+	Topology_RandomErdosRenyi     : nx.spring_layout,
+	Topology_RandomBarabasiAlbert : nx.spring_layout,
+	Topology_RandomWattsStrogatz  : nx.spring_layout,
+}
+
+
 class Topology:
 	def __init__(self, config: TopologyConfig):
 		match config:
 			case TopologyConfig_Explicit(graph, layout):
-				self.graph      = graph
-				self.get_layout = layout if layout else nx.kamada_kawai_layout
+				self.graph           = graph
+				self.layout_function = layout if layout else layout_kamada_kawai_capped
 			case TopologyConfig_Generated(graph_type, topology_type):
-				self.graph      = self.generate_graph(graph_type, topology_type)
-				self.get_layout = Topology.get_layout_function(topology_type)
+				self.graph           = self.generate_graph(graph_type, topology_type)
+				self.layout_function = Topology.get_layout_function(topology_type)
 			case _:
 				raise ValueError(f"Unknown topology configuration '{config}'.")
+		self.layout_cached : NodePosDict | None = None
+		self.build_csr()
+
+	def get_layout(self, graph: GraphType | None = None) -> NodePosDict:
+		# force-directed layouts are the single most expensive part of model
+		# setup on large graphs and the topology is static, so the positions
+		# are computed once and memoized on the instance; `graph` defaults to
+		# (and is expected to be) this topology's own graph
+		if self.layout_cached is None:
+			self.layout_cached = self.layout_function(self.graph if graph is None else graph)
+		return self.layout_cached
+
+	def invalidate_layout(self) -> None:
+		self.layout_cached = None
+
+	def build_csr(self) -> None:
+		# flat CSR adjacency for the static topology: neighbor queries become a
+		# zero-copy array slice instead of a NetworkX dict-of-dicts walk;
+		# only possible when nodes are densely numbered 0..N-1 (always true for
+		# generated topologies, not guaranteed for explicit graphs)
+		nodes = list(self.graph.nodes())
+		if not all(isinstance(node, int) for node in nodes) or sorted(nodes) != list(range(len(nodes))):
+			self.csr_indptr      = None
+			self.csr_indices     = None
+			self.neighbor_matrix = None
+			return
+		indptr  = [0]
+		indices : list[int] = []
+		for node in range(len(nodes)):
+			neighbors = list(self.graph.neighbors(node))
+			indices.extend(neighbors)
+			indptr.append(len(indices))
+		self.csr_indptr  = np.asarray(indptr,  dtype = np.int32)
+		self.csr_indices = np.asarray(indices, dtype = np.int32)
+		# fixed-width (n_nodes, max_degree) neighbor matrix: one 2D row gather
+		# per node, no indptr lookups; short rows are padded with the virtual
+		# node index n_nodes, which occupancy arrays map to "free" (see
+		# get_node_to_agent_array's sentinel slot)
+		degrees = np.diff(self.csr_indptr)
+		width   = int(degrees.max()) if degrees.size > 0 else 0
+		self.neighbor_matrix = np.full((len(nodes), width), len(nodes), dtype = np.int32)
+		for node in range(len(nodes)):
+			row = self.csr_indices[self.csr_indptr[node] : self.csr_indptr[node + 1]]
+			self.neighbor_matrix[node, : row.size] = row
+
+	def neighbors_of(self, node: int) -> np.ndarray:
+		if self.csr_indptr is None:
+			return np.asarray(list(self.graph.neighbors(node)), dtype = np.int32)
+		return self.csr_indices[self.csr_indptr[node] : self.csr_indptr[node + 1]]
 
 	def generate_graph(
 		self,
 		graph_type    : GraphType_Literal,
 		topology_type : TopologyType,
 	) -> GraphType:
-		if   graph_type == "Graph"        : graph_builder = nx.Graph
-		elif graph_type == "DiGraph"      : graph_builder = nx.DiGraph
-		elif graph_type == "MultiGraph"   : graph_builder = nx.MultiGraph
-		elif graph_type == "MultiDiGraph" : graph_builder = nx.MultiDiGraph
-		else:
+		graph_builder = GRAPH_TYPE_BUILDERS.get(graph_type)
+		if graph_builder is None:
 			raise ValueError(f"Invalid graph type '{graph_type}'")
-
-
-		def build_diagonal_grid(dimensions: tuple[int, int]) -> GraphType:
-			result = nx.grid_graph(dim=dimensions)
-			for i in range(dimensions[0]-1):
-				for j in range(dimensions[1]-1):
-					result.add_edge((i,j), (i+1,j+1))
-					result.add_edge((i+1,j), (i,j+1))
-			return result
-
-		match topology_type:
-			case Topology_Line                 (length)                             :  topology = nx.path_graph(length)
-			case Topology_Grid                 (dimensions)                         :  topology = nx.grid_graph(dim=dimensions)
-			case Topology_GridDiagonals        (dimensions)                         :  topology = build_diagonal_grid(dimensions)
-			case Topology_Cube                 (dimensions)                         :  topology = nx.grid_graph(dim=dimensions)
-			case Topology_Ring                 (length)                             :  topology = nx.cycle_graph(length)
-			case Topology_Star                 (outer_nodes)                        :  topology = nx.star_graph(outer_nodes)
-			case Topology_Planar               (nodes)                              :  raise NotImplementedError("Topology.generate_graph(): Topology_Planar")
-			case Topology_Clique               (nodes)                              :  topology = nx.complete_graph(nodes)
-			case Topology_Torus                (dimensions)                         :  topology = nx.grid_graph(dim=dimensions, periodic=True)
-			case Topology_Hypertorus           (dimensions)                         :  topology = nx.grid_graph(dim=dimensions, periodic=True)
-			case Topology_RandomTree           (nodes)                              :  topology = nx.random_tree(nodes)
-			case Topology_RandomErdosRenyi     (nodes, probability)                 :  topology = nx.erdos_renyi_graph(nodes, probability)
-			case Topology_RandomBarabasiAlbert (nodes, edges)                       :  topology = nx.barabasi_albert_graph(nodes, edges)
-			case Topology_RandomWattsStrogatz  (nodes, edges, rewiring_probability) :  topology = nx.watts_strogatz_graph(nodes, edges, rewiring_probability)
-			case _:
-				raise ValueError(f"Unknown topology type {topology_type}.")
-		topology = nx.relabel_nodes(topology, {node: i for i, node in enumerate(topology.nodes())})
+		topology_builder = TOPOLOGY_GRAPH_BUILDERS.get(type(topology_type))
+		if topology_builder is None:
+			raise ValueError(f"Unknown topology type {topology_type}.")
+		topology = topology_builder(topology_type)
+		# relabeling is a full graph copy: only pay for it when the builder did
+		# not already emit dense integer labels 0..N-1 (tuple-labeled nx grids)
+		nodes = list(topology.nodes())
+		if not all(isinstance(node, int) for node in nodes) or sorted(nodes) != list(range(len(nodes))):
+			topology = nx.relabel_nodes(topology, {node: i for i, node in enumerate(nodes)})
+		# converting into the requested graph class is another whole-graph
+		# copy: skip it when the builder already produced that exact type
+		# (the common "Graph" case)
+		if type(topology) is graph_builder:
+			return topology
 		result = graph_builder(topology)
 		return result
 
 	@staticmethod
 	def get_layout_function(topology_type: TopologyType) -> LayoutFunction:
 		# https://networkx.org/documentation/stable/reference/drawing.html#module-networkx.drawing.layout
-		match topology_type:
-			case Topology_Line                 (_) :  result = nx.spring_layout
-			case Topology_Grid                 (_) :  result = nx.kamada_kawai_layout
-			case Topology_GridDiagonals        (_) :  result = nx.kamada_kawai_layout
-			case Topology_Cube                 (_) :  result = nx.fruchterman_reingold_layout
-			case Topology_Ring                 (_) :  result = nx.spring_layout
-			case Topology_Star                 (_) :  result = nx.spring_layout
-			case Topology_Planar               (_) :  result = nx.spring_layout
-			case Topology_Clique               (_) :  result = nx.spring_layout
-			case Topology_Torus                (_) :  result = nx.fruchterman_reingold_layout
-			case Topology_Hypertorus           (_) :  result = nx.fruchterman_reingold_layout
-			case Topology_RandomTree           (_) :  result = nx.spring_layout
-			case Topology_RandomErdosRenyi     (_) :  result = nx.spring_layout
-			case Topology_RandomBarabasiAlbert (_) :  result = nx.spring_layout
-			case Topology_RandomWattsStrogatz  (_) :  result = nx.spring_layout
-			case _:
-				raise ValueError("get_layout_function(): Unknown topology type.")
+		result = TOPOLOGY_LAYOUTS.get(type(topology_type))
+		if result is None:
+			raise ValueError("get_layout_function(): Unknown topology type.")
 		return result
@@ -8,6 +8,7 @@ from typing import (
 	TypeVar,
 )
 
+from numpy import ndarray
 from networkx import (
 	Graph,
 	DiGraph,
@@ -118,7 +119,7 @@ MovementMode = Literal[
 #	"max_mixed", # runs both max_jump and max_swap, picks the best TODO
 #	"mutual_max_swap": #costly, TODO? handle cycles of length > 2 ?
 ]
-Assignment = dict[AgentID, NodeID]
+Assignment = ndarray # int32 array of length n_agents, mapping AgentID (the index) -> NodeID
 History    = list[Assignment]
 
 
@@ -185,6 +186,15 @@ Utility_Scalarized = Callable[  # cost-type utility for minimization
 	float,
 ]
 
+Utility_Scalarized_Ids = Callable[  # SoA-store variant: works on agent IDs, not value dicts
+	[
+		AgentID,                # current agent's ID into the AgentStore arrays
+		ndarray,                # neighbor agent IDs, as an int array
+		Any,                    # used for additional context, like for social game graphs
+	],
+	float,
+]
+
 
 """
 #######################
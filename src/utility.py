@@ -1,8 +1,9 @@
 from __future__ import annotations
-from typing import Callable, Literal, Any
+from typing import Callable, Literal, Any, TYPE_CHECKING
+from functools import lru_cache
 from math import log
 
-from networkx import DiGraph, MultiDiGraph
+import numpy as np
 
 from src.types import (
 	GraphType,
@@ -14,11 +15,15 @@ from src.types import (
 	AgentType_Domain,
 	Utility_Criterion,
 	Utility_Scalarized,
+	Utility_Scalarized_Ids,
 	Utility_Criterion_AgentID,
 	Utility_Criterion_Discrete,
 	Utility_Criterion_Continuous,
 	GenericAgentValue,
 )
+from src.kernels import count_equal, count_in_range_abs, count_in_range_log
+if TYPE_CHECKING:
+	from src.store import AgentStore
 
 
 
@@ -34,11 +39,12 @@ def any_sum(
 	condition against that central agent, maps them to a specific value,
 	then sums that into a float.
 	"""
-	count = sum(
-		mapping_func(self_value, neighbor_val)
-		for neighbor_val in neighbor_vals
-		if condition(self_value, neighbor_val)
-	)
+	# plain loop rather than a genexpr fed to sum(): no generator frame per
+	# call, and the two callables stay in fast locals for the inner loop
+	count = 0.0
+	for neighbor_val in neighbor_vals:
+		if condition(self_value, neighbor_val):
+			count += mapping_func(self_value, neighbor_val)
 	return count
 
 def simple_sum(
@@ -49,10 +55,28 @@ def simple_sum(
 	"""
 	Counts the number of neighbors of a central agent that satisfy a condition
 	"""
-	count = any_sum(self_value, neighbor_vals, condition, lambda x, y: 1.0)
+	# inlined counter: delegating to any_sum with a constant summand costs an
+	# extra Python call per matching neighbor
+	count = 0.0
+	for neighbor_val in neighbor_vals:
+		if condition(self_value, neighbor_val):
+			count += 1.0
 	return count
 
 
+def condition_equal(
+	self_value   : GenericAgentValue,
+	neighbor_val : GenericAgentValue,
+) -> bool:
+	return self_value == neighbor_val
+
+def summand_one(
+	self_value   : GenericAgentValue,
+	neighbor_val : GenericAgentValue,
+) -> float:
+	return 1.0
+
+
 def ratio_func_basic(
 	count_same : int | float,
 	count_all  : int | float,
@@ -75,17 +99,38 @@ def ratio_func_modified(
 	ratio = (count_same + 1) / (count_all + 1)
 	return ratio
 
+# partial-evaluated in-range conditions, one per (distance_func, max_dist):
+# repeated builds with the same parameters (UI-driven model rebuilds) reuse
+# the same specialized function instead of growing a fresh closure each time
+CONDITION_IN_RANGE_CACHE : dict[tuple[Callable, float], Callable] = {}
+
 def builder_condition_in_range(
 	distance_func : Callable[[GenericAgentValue, GenericAgentValue], float],
 	max_dist      : float,
 ) -> Callable[[GenericAgentValue, GenericAgentValue], bool]:
-	def condition(
-		self_value    : GenericAgentValue,
-		neighbor_val  : GenericAgentValue,
-	) -> bool:
-		distance = distance_func(self_value, neighbor_val)
-		result   = distance <= max_dist
-		return result
+	key    = (distance_func, max_dist)
+	cached = CONDITION_IN_RANGE_CACHE.get(key)
+	if cached is not None:
+		return cached
+	# constants are bound as default arguments: LOAD_FAST in the condition
+	# body instead of a cell dereference per call; the absolute distance is
+	# additionally inlined, dropping its extra Python call per neighbor
+	if distance_func is distance_absolute:
+		def condition(
+			self_value    : GenericAgentValue,
+			neighbor_val  : GenericAgentValue,
+			_max_dist     : float = max_dist,
+		) -> bool:
+			return abs(self_value - neighbor_val) <= _max_dist  # type:ignore
+	else:
+		def condition(
+			self_value    : GenericAgentValue,
+			neighbor_val  : GenericAgentValue,
+			_distance     : Callable = distance_func,
+			_max_dist     : float    = max_dist,
+		) -> bool:
+			return _distance(self_value, neighbor_val) <= _max_dist
+	CONDITION_IN_RANGE_CACHE[key] = condition
 	return condition
 
 def distance_absolute(
@@ -95,11 +140,15 @@ def distance_absolute(
 	distance = abs(self_value - neighbor_val)
 	return distance
 
+# agent values never change during a run, so each distinct value pays for its
+# transcendental exactly once across all pairwise distance evaluations
+log_cached = lru_cache(maxsize = None)(log)
+
 def distance_logarithmic(
 	self_value   : AgentType_Value_Continuous,
 	neighbor_val : AgentType_Value_Continuous,
 ) -> float:
-	distance = abs(log(self_value) - log(neighbor_val))
+	distance = abs(log_cached(self_value) - log_cached(neighbor_val))
 	return distance
 
 
@@ -124,6 +173,60 @@ def builder_utility_similarneighbor(
 	manipulate multi-criteria utility (e.g., for weighing), or to implement things like
 	lower/upper bound thresholds, etc.
 	"""
+	if condition is condition_equal and summand_mapping is summand_one:
+		# recognized default criterion: list.count runs the whole equality
+		# scan in C (and works for category strings as well as floats),
+		# instead of two Python calls per neighbor
+		if ratio_func is None:
+			def utility_equalneighbor_absolute(
+				self_value    : GenericAgentValue,
+				neighbor_vals : list[GenericAgentValue],
+				context       : None,
+			) -> float:
+				count  = float(neighbor_vals.count(self_value))
+				result = output_mapping(count) if output_mapping is not None else count
+				return result
+			return utility_equalneighbor_absolute
+
+		def utility_equalneighbor_relative(
+			self_value    : GenericAgentValue,
+			neighbor_vals : list[GenericAgentValue],
+			context       : None,
+		) -> float:
+			count_all  = len(neighbor_vals)
+			count_same = neighbor_vals.count(self_value)
+			ratio      = ratio_func(count_same, count_all)
+			result     = output_mapping(ratio) if output_mapping is not None else ratio
+			return result
+		return utility_equalneighbor_relative
+
+	if summand_mapping is summand_one:
+		# identity summand with a custom condition (e.g. an in-range check):
+		# count matches through simple_sum instead of paying a Python call
+		# that returns the constant 1.0 for every matching neighbor
+		if ratio_func is None:
+			def utility_countneighbor_absolute(
+				self_value    : GenericAgentValue,
+				neighbor_vals : list[GenericAgentValue],
+				context       : None,
+			) -> float:
+				count  = simple_sum(self_value, neighbor_vals, condition)
+				result = output_mapping(count) if output_mapping is not None else count
+				return result
+			return utility_countneighbor_absolute
+
+		def utility_countneighbor_relative(
+			self_value    : GenericAgentValue,
+			neighbor_vals : list[GenericAgentValue],
+			context       : None,
+		) -> float:
+			count_all  = len(neighbor_vals)
+			count_same = simple_sum(self_value, neighbor_vals, condition)
+			ratio      = ratio_func(count_same, count_all)
+			result     = output_mapping(ratio) if output_mapping is not None else ratio
+			return result
+		return utility_countneighbor_relative
+
 	if ratio_func is None:
 		def utility_sameneighbor_absolute(
 			self_value    : GenericAgentValue,
@@ -156,38 +259,158 @@ def builder_utility_neighborinrange(
 	max_dist        : float,
 	output_mapping  : Callable[[float], float] | None,
 ) -> Utility_Criterion_Continuous:
-	condition = builder_condition_in_range(distance_func, max_dist)
-	result = builder_utility_similarneighbor(condition, summand_mapping, ratio_func, output_mapping)
+	if summand_mapping is summand_one and distance_func in (distance_absolute, distance_logarithmic):
+		# recognized default criterion: count in the compiled kernel over one
+		# float64 gather instead of one Python distance call per neighbor
+		kernel = count_in_range_abs if distance_func is distance_absolute else count_in_range_log
+
+		def range_count(
+			self_value    : AgentType_Value_Continuous,
+			neighbor_vals : list[AgentType_Value_Continuous],
+		) -> int:
+			arr = np.fromiter(neighbor_vals, dtype = np.float64, count = len(neighbor_vals))
+			return kernel(arr, float(self_value), max_dist)
+
+		if ratio_func is None:
+			def utility_range_absolute(
+				self_value    : AgentType_Value_Continuous,
+				neighbor_vals : list[AgentType_Value_Continuous],
+				context       : None,
+			) -> float:
+				count  = float(range_count(self_value, neighbor_vals))
+				result = output_mapping(count) if output_mapping is not None else count
+				return result
+			return utility_range_absolute
+
+		def utility_range_relative(
+			self_value    : AgentType_Value_Continuous,
+			neighbor_vals : list[AgentType_Value_Continuous],
+			context       : None,
+		) -> float:
+			count_all  = len(neighbor_vals)
+			count_same = range_count(self_value, neighbor_vals)
+			ratio      = ratio_func(count_same, count_all)
+			result     = output_mapping(ratio) if output_mapping is not None else ratio
+			return result
+		return utility_range_relative
+
+	if distance_func is not distance_logarithmic:
+		condition = builder_condition_in_range(distance_func, max_dist)
+		result = builder_utility_similarneighbor(condition, summand_mapping, ratio_func, output_mapping)
+		return result
+
+	# specialization for the logarithmic distance: hoist log(self_value) out of
+	# the neighbor loop instead of recomputing it once per neighbor
+	def log_range_sum(
+		self_value    : AgentType_Value_Continuous,
+		neighbor_vals : list[AgentType_Value_Continuous],
+	) -> float:
+		log_self = log_cached(self_value)
+		count = sum(
+			summand_mapping(self_value, neighbor_val)
+			for neighbor_val in neighbor_vals
+			if abs(log_cached(neighbor_val) - log_self) <= max_dist
+		)
+		return count
+
+	if ratio_func is None:
+		def utility_logrange_absolute(
+			self_value    : AgentType_Value_Continuous,
+			neighbor_vals : list[AgentType_Value_Continuous],
+			context       : None,
+		) -> float:
+			count  = log_range_sum(self_value, neighbor_vals)
+			result = output_mapping(count) if output_mapping is not None else count
+			return result
+		result = utility_logrange_absolute
+	else:
+		def utility_logrange_relative(
+			self_value    : AgentType_Value_Continuous,
+			neighbor_vals : list[AgentType_Value_Continuous],
+			context       : None,
+		) -> float:
+			count_all  = len(neighbor_vals)
+			count_same = log_range_sum(self_value, neighbor_vals)
+			ratio      = ratio_func(count_same, count_all)
+			result     = output_mapping(ratio) if output_mapping is not None else ratio
+			return result
+		result = utility_logrange_relative
 	return result
 
+def build_affinity_arrays(
+	social_net : GraphType,
+) -> tuple[dict[AgentID, np.ndarray], dict[AgentID, np.ndarray]]:
+	"""
+	Scans the social graph once and splits each agent's relationships into
+	two sorted int arrays (friends and enemies), so that per-call counting
+	becomes a vectorized membership test instead of a NetworkX edge walk.
+	"""
+	friends : dict[AgentID, np.ndarray] = {}
+	enemies : dict[AgentID, np.ndarray] = {}
+	directed = social_net.is_directed()
+	for node in social_net.nodes():
+		node_friends : list[AgentID] = []
+		node_enemies : list[AgentID] = []
+		relationships = social_net.out_edges(node, data = True) if directed else social_net.edges(node, data = True)
+		for _, target, data in relationships:
+			affinity = data.get("weight", 0) if isinstance(data, dict) else data
+			if   affinity > 0:  node_friends.append(target)
+			elif affinity < 0:  node_enemies.append(target)
+		friends[node] = np.sort(np.asarray(node_friends, dtype = np.int32))
+		enemies[node] = np.sort(np.asarray(node_enemies, dtype = np.int32))
+	return friends, enemies
+
+
 def builder_utility_friendandenemies(
 	handle_friends : bool,
 	handle_enemies : bool,
 	mode           : Literal["count", "ratio"],
+	social_net     : GraphType | None = None,
 ) -> Utility_Criterion_AgentID:
+	if social_net is not None:
+		friends, enemies = build_affinity_arrays(social_net)
+
+		def utility_friendandenemies_csr(
+			self_id   : AgentID,
+			neighbors : list[AgentID],
+			context   : GraphType,
+		) -> float:
+			neighbor_arr  = np.asarray(neighbors, dtype = np.int32)
+			count_friends = int(np.isin(neighbor_arr, friends[self_id]).sum())
+			count_enemies = int(np.isin(neighbor_arr, enemies[self_id]).sum())
+			result = 0.0
+			if mode == "count":
+				if handle_friends: result += count_friends
+				if handle_enemies: result -= count_enemies
+			if mode == "ratio":
+				result = (count_friends + 1) / (count_friends + count_enemies + 1)
+			return result
+		return utility_friendandenemies_csr
+
+	# the social graph is fixed for a simulation: resolve the adjacency
+	# mapping on the first call instead of isinstance-branching per invocation
+	adjacency : Any = None
+
 	def utility_friendandenemies(
 		self_id   : AgentID,
 		neighbors : list[AgentID],
 		context   : GraphType,
 	) -> float:
-		social_neighbors = context.neighbors(self_id)
-		if isinstance(context, DiGraph) or isinstance(context, MultiDiGraph):
-			social_relationships = context.out_edges(self_id)
-		else:
-			social_relationships = context.edges(self_id)
-		affinities = {
-			target: value
-			for source, target in social_relationships
-			if (value := context.get_edge_data(source, target)) is not None
-		}
-		count_friends = sum(
-			1 for neighbor in neighbors
-			if neighbor in affinities and affinities[neighbor] > 0
-		)
-		count_enemies = sum(
-			1 for neighbor in neighbors
-			if neighbor in affinities and affinities[neighbor] < 0
-		)
+		nonlocal adjacency
+		if adjacency is None:
+			adjacency = context.succ if context.is_directed() else context.adj
+		# single pass over the adjacency inner dict against a neighbor set,
+		# counting both sides directly: iterating adj[self_id].items() hands
+		# out each edge's data with no per-edge get_edge_data hash chain and
+		# no intermediate affinities dict
+		neighbor_set  = set(neighbors)
+		count_friends = 0
+		count_enemies = 0
+		for target, affinity in adjacency[self_id].items():
+			if target not in neighbor_set or affinity is None:
+				continue
+			if   affinity > 0:  count_friends += 1
+			elif affinity < 0:  count_enemies += 1
 		result = 0.0
 		if mode == "count":
 			if handle_friends: result += count_friends
@@ -198,8 +421,32 @@ def builder_utility_friendandenemies(
 	return utility_friendandenemies
 
 def builder_utility_specificphily(
-	philys : dict[AgentType_Value_Discrete, Utility_Criterion_Discrete],
+	philys     : dict[AgentType_Value_Discrete, Utility_Criterion_Discrete],
+	code_table : dict[AgentType_Value_Discrete, int] | None = None,
 ) -> Utility_Criterion_Discrete:
+	if code_table is not None:
+		# values arrive as int codes: dispatch through a list indexed by code
+		# instead of hashing the value on every call; undefined codes hold a
+		# raising sentinel so the hot path carries no None check
+		def raise_missing(
+			self_value : AgentType_Value_Discrete,
+			neighbors  : list[AgentType_Value_Discrete],
+			context    : None,
+		) -> float:
+			raise ValueError(f"Specific phily utility not defined for code '{self_value}'")
+
+		philys_by_code : list[Utility_Criterion_Discrete] = [raise_missing] * len(code_table)
+		for value, criterion in philys.items():
+			philys_by_code[code_table[value]] = criterion
+
+		def utility_specificphily_coded(
+			self_value : AgentType_Value_Discrete,
+			neighbors  : list[AgentType_Value_Discrete],
+			context    : None,
+		) -> float:
+			return philys_by_code[int(self_value)](self_value, neighbors, context)  # type:ignore
+		return utility_specificphily_coded
+
 	def utility_specificphily(
 		self_value : AgentType_Value_Discrete,
 		neighbors  : list[AgentType_Value_Discrete],
@@ -211,22 +458,100 @@ def builder_utility_specificphily(
 	return utility_specificphily
 
 
+# below this neighborhood size, the linear count_equal kernel beats sorting
+# a bucket and binary-searching it (grids sit at degree 4-8; the bucket path
+# pays off on cliques and Barabasi-Albert hubs)
+SEARCHSORTED_MIN_DEGREE = 32
+
+
+def get_default_utility_scalarized_store_function(
+	store : AgentStore,
+) -> Utility_Scalarized_Ids:
+	"""
+	SoA variant of the default scalarized utility: one vectorized numpy pass
+	per type over the neighbor-ID gather, instead of one Python dict lookup
+	per neighbor per type.
+	"""
+	# bind the columns once at build time so the hot path does no dict lookups,
+	# just array gathers over the one shared neighbor-ID array
+	discrete_columns = tuple(store.codes[k] for k in store.codes if k in store.code_tables)
+	range_columns    = tuple(store.codes[k] for k in store.codes if k not in store.code_tables)
+	# sorted neighbor-code buckets, keyed by the neighbor-ID bytes: many agents
+	# evaluate the same candidate node per step, and agent values are immutable,
+	# so a bucket computed once answers count(code == v) in O(log deg) for every
+	# later query within the step; the model clears it on each new assignment,
+	# since occupancy changes re-key every entry and stale ones only accumulate
+	bucket_cache : dict[bytes, tuple[np.ndarray, ...]] = {}
+
+	def utility_scalarized_ids(
+		self_id      : int,
+		neighbor_ids : np.ndarray,
+		context      : Any,
+	) -> float:
+		count_all = neighbor_ids.size
+		if count_all == 0:
+			return 0.0
+		result = 0.0
+		if count_all >= SEARCHSORTED_MIN_DEGREE and len(discrete_columns) > 0:
+			key     = neighbor_ids.tobytes()
+			buckets = bucket_cache.get(key)
+			if buckets is None:
+				buckets = tuple(np.sort(column[neighbor_ids]) for column in discrete_columns)
+				bucket_cache[key] = buckets
+			for bucket, column in zip(buckets, discrete_columns):
+				self_code  = column[self_id]
+				count_same = (
+					np.searchsorted(bucket, self_code, side = "right")
+					- np.searchsorted(bucket, self_code, side = "left")
+				)
+				result += count_same / count_all
+		else:
+			for column in discrete_columns:
+				result += count_equal(column[neighbor_ids], column[self_id]) / count_all
+		for column in range_columns:
+			result += count_in_range_abs(column[neighbor_ids], column[self_id], 1.0) / count_all
+		return result
+
+	utility_scalarized_ids.clear_cache = bucket_cache.clear  # type:ignore
+	return utility_scalarized_ids
+
+
+# memo of default scalarized utilities keyed by domain contents: the UI
+# rebuilds the model on every slider change, and rebuilding the same domain
+# must not re-generate all the criterion closures (combiner closures are not
+# cached since callables do not make stable keys)
+SCALARIZED_CACHE : dict[tuple, Utility_Scalarized] = {}
+
+
 def get_default_utility_scalarized_function(
 	domain        : AgentType_Domain,
-	combiner      : Callable[[dict[AgentType_Name, Utility_Criterion]], float] | None = None,
+	combiner      : Callable[[dict[AgentType_Name, float]], float] | None = None,
 ) -> Utility_Scalarized:
+	cache_key : tuple | None = None
+	if combiner is None:
+		# the kind tag keeps discrete and continuous domains with identical
+		# contents apart: {"x": [0, 1]} and {"x": (0, 1)} build different
+		# criteria and must not share a memo entry
+		cache_key = tuple(sorted(
+			(k, ("d", tuple(v)) if isinstance(v, list) else ("c", v))
+			for k, v in domain.items()
+		))
+		if cache_key in SCALARIZED_CACHE:
+			return SCALARIZED_CACHE[cache_key]
+	# the named condition/summand defaults let the builders recognize the
+	# criteria by identity and emit their specialized counting paths
 	safe_criteria_dict = {
 		k: (
 			builder_utility_similarneighbor(
-				condition       = lambda x, y: x == y,  #type:ignore
-				summand_mapping = lambda x, y: 1.0,
+				condition       = condition_equal,
+				summand_mapping = summand_one,
 				ratio_func      = ratio_func_basic,
 				output_mapping  = None,
 			)
 			if isinstance(v, list) else
 			builder_utility_neighborinrange(
 				ratio_func      = ratio_func_basic,
-				summand_mapping = lambda x, y: 1.0,
+				summand_mapping = summand_one,
 				distance_func   = distance_absolute,
 				max_dist        = 1,
 				output_mapping  = None,
@@ -235,23 +560,45 @@ def get_default_utility_scalarized_function(
 		for k, v in domain.items()
 	}
 
-	def utility_scalarized(
-		self_vector : AgentType_Vector,
-		neighbors   : list[AgentType_Vector],
-		context     : Any,
-	) -> float:
-		result = 0.0
-		if combiner:
-			result = combiner(safe_criteria_dict)
-		else:
-			for key in safe_criteria_dict.keys():
-				criterion     = safe_criteria_dict[key]
-				self_value    = self_vector[key]
-				neighbor_vals = [neighbor[key] for neighbor in neighbors]
-				partial       = criterion(self_value, neighbor_vals, context)
-			#	print(f"Utility for key {key}, value {self_value}, neighbors {neighbors}, partial {partial}")
-				result       += partial  # TODO sum, average, multiply for different welfares
-		return result
+	if combiner:
+		# evaluate every criterion and hand the combiner the computed partial
+		# utilities (it used to receive the raw criterion functions and never
+		# saw the neighborhood at all); items are frozen to a tuple so the hot
+		# path iterates pairs instead of re-hashing keys
+		criteria_items = tuple(safe_criteria_dict.items())
 
-	return utility_scalarized
+		def utility_scalarized(
+			self_vector : AgentType_Vector,
+			neighbors   : list[AgentType_Vector],
+			context     : Any,
+		) -> float:
+			partials = {
+				key: criterion(self_vector[key], [neighbor[key] for neighbor in neighbors], context)
+				for key, criterion in criteria_items
+			}
+			result = combiner(partials)
+			return result
+		return utility_scalarized
+
+	# the key set and criteria are fixed for a given domain: specialize the
+	# scalarization into a straight-line function with the keys baked in,
+	# removing the per-call dict iteration (runtime codegen)
+	keys      = list(safe_criteria_dict.keys())
+	namespace : dict[str, Any] = {
+		f"criterion_{i}": safe_criteria_dict[key]
+		for i, key in enumerate(keys)
+	}
+	lines = ["def utility_scalarized(self_vector, neighbors, context):"]
+	for i, key in enumerate(keys):
+		lines.append(f"\tneighbor_vals_{i} = [neighbor[{key!r}] for neighbor in neighbors]")
+	summands = " + ".join(
+		f"criterion_{i}(self_vector[{key!r}], neighbor_vals_{i}, context)"
+		for i, key in enumerate(keys)
+	)
+	lines.append(f"\treturn {summands if summands else '0.0'}")
+	exec("\n".join(lines), namespace)  # TODO sum, average, multiply for different welfares
+	result = namespace["utility_scalarized"]
+	if cache_key is not None:
+		SCALARIZED_CACHE[cache_key] = result
+	return result
 
@@ -1,17 +1,31 @@
-from matplotlib.pyplot import Figure, subplots, imread
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from matplotlib.figure import Figure
+from matplotlib.image  import imread
 from PIL import Image
 import os
 import platform
 
 from src.config_defaults import DEFAULT_GIF_FRAME_DURATION
 
+# resolved once at import: platform.system() never changes within a process
+IS_POSIX = platform.system() in ("Linux", "Darwin")
+
 
 
 
 def combine_img_plots(fig_paths: list[str]) -> Figure:
-	result_fig, axes = subplots(1, len(fig_paths))
-	for ax, fig_path in zip(axes, fig_paths):
-		img = imread(fig_path)
+	# PNG decode is zlib-bound and releases the GIL, so the reads scale on a
+	# thread pool; only the matplotlib draw stays serial
+	with ThreadPoolExecutor() as executor:
+		images = list(executor.map(imread, fig_paths))
+	# object-oriented construction, same as the model's renderer: no pyplot
+	# global figure manager, so this is safe from the export worker threads
+	# and the per-frame figures are not retained for the life of the process
+	result_fig = Figure()
+	axes = result_fig.subplots(1, len(fig_paths), squeeze = False)[0]
+	for ax, img in zip(axes, images):
 		ax.imshow(img)
 		ax.axis('off')
 	return result_fig
@@ -23,17 +37,25 @@ def export_gif_from_pngs(
 	duration     : int | None = None
 ) -> None:
 	duration = duration if duration is not None else DEFAULT_GIF_FRAME_DURATION
-	images = [Image.open(png) for png in png_paths]
-	images[0].save(
-		gif_filename, 
-		save_all      = True, 
-		append_images = images[1:], 
-		duration      = duration,
-	)
+
+	def stream_frames():
+		# decode one frame at a time while PIL appends, instead of holding
+		# every decoded frame in memory at once; close each behind us
+		for png in png_paths[1:]:
+			with Image.open(png) as image:
+				yield image
+
+	with Image.open(png_paths[0]) as first:
+		first.save(
+			gif_filename,
+			save_all      = True,
+			append_images = stream_frames(),
+			duration      = duration,
+		)
 
 
 def set_nice_level(level):
-	if platform.system() in ["Linux", "Darwin"]:
+	if IS_POSIX:
 		try:
 			os.nice(level)
 			print(f"Set process niceness level to {level}")
@@ -42,3 +64,26 @@ def set_nice_level(level):
 			raise e
 	else:
 		print(f"os.nice() is not supported on this operating system ({platform.system()}).")
+
+
+@contextmanager
+def renice(level):
+	"""
+	Temporarily lowers the process priority to `level` for a heavy phase
+	(batch exports), without pinning the whole interactive session there.
+	Raising niceness back up needs privileges on POSIX, so restoration is
+	best-effort: unprivileged processes simply stay at the lower priority.
+	"""
+	delta = 0
+	if IS_POSIX:
+		delta = max(level - os.nice(0), 0)
+		if delta > 0:
+			os.nice(delta)
+	try:
+		yield
+	finally:
+		if delta > 0:
+			try:
+				os.nice(-delta)
+			except (PermissionError, OSError):
+				pass